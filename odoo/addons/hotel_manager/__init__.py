@@ -1,2 +1,4 @@
 #The __init__.py file is essential to call models folder that containes the models(functionalities) of the module
-from . import models
\ No newline at end of file
+from . import models
+from . import controllers
+from . import reports
\ No newline at end of file
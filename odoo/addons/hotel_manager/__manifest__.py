@@ -3,7 +3,7 @@
     'name': 'Hotel Management',
     
     # The version of the module, which can be updated as the module evolves
-    'version': '1.0',
+    'version': '1.1',
     
     # A brief summary of what the module does
     'summary': 'Manage your reservations, guests, rooms and services in your hotel efficiently.',
@@ -32,6 +32,7 @@
         'views/rooms.xml',                # View for rooms management
         'views/analysis.xml',             # View for data analysis
         'views/guest.xml',                # View for guest management
+        'views/monitoring.xml',           # View for scheduled job and performance monitoring
         'security/security.xml',          # Security rules for the module
         'security/ir.model.access.csv',   # Access control for different user roles
         'data/data.xml',                  # Initial data or configuration settings
@@ -0,0 +1,10 @@
+from odoo import http
+from odoo.http import request
+
+
+class HotelPerfController(http.Controller):
+
+    @http.route('/hotel_manager/perf_stats', type='json', auth='user')
+    def perf_stats(self, date_from=None, date_to=None, method=None):
+        """Per method summary of the recorded performance samples, see hotel.perf.stat.get_summary."""
+        return request.env['hotel.perf.stat'].get_summary(date_from=date_from, date_to=date_to, method=method)
@@ -0,0 +1,36 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Number of reservations backfilled per statement
+BATCH_SIZE = 10000
+
+
+def migrate(cr, version):
+    """Backfill the stored reservation totals in id batches with set-based updates."""
+    cr.execute("SELECT MIN(id), MAX(id) FROM hotel_reservation")
+    min_id, max_id = cr.fetchone()
+    if not min_id:
+        return
+    for start in range(min_id, max_id + 1, BATCH_SIZE):
+        cr.execute("""
+            UPDATE hotel_reservation r
+               SET services_total_price = COALESCE((
+                       SELECT SUM(line.total_price)
+                         FROM hotel_reservation_service_line line
+                        WHERE line.reserv_id = r.id
+                   ), 0)
+             WHERE r.id >= %(start)s AND r.id < %(stop)s
+        """, {'start': start, 'stop': start + BATCH_SIZE})
+        cr.execute("""
+            UPDATE hotel_reservation r
+               SET total_price = CASE
+                       WHEN COALESCE(room.price, 0) != 0 AND COALESCE(r.nights, 0) != 0
+                       THEN room.price * r.nights + r.services_total_price
+                       ELSE 0
+                   END
+              FROM hotel_room room
+             WHERE room.id = r.room_id
+               AND r.id >= %(start)s AND r.id < %(stop)s
+        """, {'start': start, 'stop': start + BATCH_SIZE})
+        _logger.info("Backfilled reservation totals up to id %s", min(start + BATCH_SIZE - 1, max_id))
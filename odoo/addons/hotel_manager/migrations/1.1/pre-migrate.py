@@ -0,0 +1,10 @@
+# Create the columns of the newly stored reservation totals before the ORM
+# sees them, so the upgrade doesn't recompute every reservation in Python.
+# The values are backfilled in batches by post-migrate.py.
+
+def migrate(cr, version):
+    cr.execute("""
+        ALTER TABLE hotel_reservation
+            ADD COLUMN IF NOT EXISTS services_total_price numeric,
+            ADD COLUMN IF NOT EXISTS total_price numeric
+    """)
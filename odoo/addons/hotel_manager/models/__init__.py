@@ -1 +1 @@
-from . import hotel_room, reservation, add_services, hotel_analysis, hotel_guest
\ No newline at end of file
+from . import hotel_room, reservation, add_services, hotel_analysis, hotel_guest, hotel_dashboard, hotel_cron, hotel_perf, hotel_report, hotel_export
\ No newline at end of file
@@ -17,4 +17,22 @@ class HotelServices(models.Model):
         string='Currency', 
         required=True, 
         default=lambda self: self.env.company.currency_id
-    )
\ No newline at end of file
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['hotel.dashboard']._invalidate_cache()
+        return super(HotelServices, self).create(vals_list)
+
+    def write(self, vals):
+        self.env['hotel.dashboard']._invalidate_cache()
+        res = super(HotelServices, self).write(vals)
+        if 'price' in vals:
+            # The stays' service lines and totals follow the new price
+            lines = self.env['hotel.reservation.service.line'].search([('service_id', 'in', self.ids)])
+            lines.reserv_id._mark_services_changed()
+        return res
+
+    def unlink(self):
+        self.env['hotel.dashboard']._invalidate_cache()
+        return super(HotelServices, self).unlink()
@@ -1,157 +1,546 @@
 from odoo import models, fields, api
-from datetime import timedelta
-from dateutil.relativedelta import relativedelta
+from .hotel_perf import profiled
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Reservation states that count as sold room nights
+SOLD_STATES = ('confirm', 'done')
+
+# Rollup granularities and their PostgreSQL date_trunc unit
+ROLLUP_PERIODS = {'weekly': 'week', 'monthly': 'month', 'yearly': 'year'}
+
+# Rollup ratio KPIs as (summed numerators, summed denominator, factor)
+ROLLUP_RATIOS = {
+    'revpar': (('total_room_revenue',), 'available_room_nights', 1),
+    'adr': (('total_room_revenue',), 'rooms_sold', 1),
+    'trevpar': (('total_room_revenue', 'total_other_revenue'), 'available_room_nights', 1),
+    'occupancy_rate': (('rooms_sold',), 'available_room_nights', 100),
+    'repeated_guest_percentage': (('repeat_stays',), 'rooms_sold', 100),
+}
+
+def merge_date_ranges(ranges):
+    """Merge overlapping or adjacent (date_from, date_to) pairs into a sorted list."""
+    merged = []
+    for date_from, date_to in sorted(r for r in ranges if r[0] and r[1]):
+        if merged and (date_from - merged[-1][1]).days <= 1:
+            merged[-1][1] = max(merged[-1][1], date_to)
+        else:
+            merged.append([date_from, date_to])
+    return [tuple(r) for r in merged]
 
 class HotelAnalysis(models.Model):
     _name = 'hotel.analysis'
     _description = 'Hotel Analysis'
+    _order = 'date'
 
     # Date of the analysis record
-    date = fields.Date(string='Date', required=True)
-    
-    # Total revenue from room bookings, computed based on related reservations
-    total_room_revenue = fields.Monetary(string='Total Room Revenue', compute='_compute_totals', currency_field='currency_id', store=True)
-    
-    # Percentage of repeated guests
-    repeated_guest_percentage = fields.Float(string='Repeated Guest Percentage (%)', compute='_compute_rgp', default=0, store=True)
-    
-    # Total number of available rooms on the given date
-    total_available_rooms = fields.Integer(string='Total Available Rooms', compute='_compute_totals', store=True)
-    
+    date = fields.Date(string='Date', required=True, index=True)
+
+    # Revenue from the room nights sold on the given date
+    total_room_revenue = fields.Monetary(string='Total Room Revenue', currency_field='currency_id', readonly=True)
+
+    # Percentage of occupied rooms held by a returning guest
+    repeated_guest_percentage = fields.Float(string='Repeated Guest Percentage (%)', default=0, readonly=True)
+
+    # Total number of rooms that can be sold on the given date
+    total_available_rooms = fields.Integer(string='Total Available Rooms', readonly=True)
+
+    # Number of room nights sold on the given date
+    rooms_sold = fields.Integer(string='Rooms Sold', readonly=True)
+
+    # Number of room nights sold to a returning guest on the given date
+    repeat_stays = fields.Integer(string='Repeat Stays', readonly=True)
+
     # Revenue per available room (RevPAR)
-    revpar = fields.Monetary(string='RevPAR', compute='_compute_revpar', currency_field='currency_id', store=True)
-    
+    revpar = fields.Monetary(string='RevPAR', currency_field='currency_id', readonly=True)
+
     # Average Daily Rate (ADR)
-    adr = fields.Monetary(string='ADR', compute='_compute_adr', currency_field='currency_id', store=True)
-    
+    adr = fields.Monetary(string='ADR', currency_field='currency_id', readonly=True)
+
     # Occupancy rate percentage
-    occupancy_rate = fields.Float(string='Occupancy Rate (%)', compute='_compute_occupancy_rate', store=True)
-    
-    # Total revenue from other services
-    total_other_revenue = fields.Monetary(string='Total Other Revenue', compute='_compute_totals', currency_field='currency_id', store=True)
-    
+    occupancy_rate = fields.Float(string='Occupancy Rate (%)', readonly=True)
+
+    # Revenue from services of the stays checking out on the given date
+    total_other_revenue = fields.Monetary(string='Total Other Revenue', currency_field='currency_id', readonly=True)
+
     # Total Revenue Per Available Room (TRevPAR)
-    trevpar = fields.Monetary(string='TRevPAR', compute='_compute_trevpar', currency_field='currency_id', store=True)
-    
+    trevpar = fields.Monetary(string='TRevPAR', currency_field='currency_id', readonly=True)
+
     # Number of loyal guests
-    loyal_guests = fields.Integer(string='Loyal Guests', default=0, compute='_compute_loyal_guests', store=True)
-    
+    loyal_guests = fields.Integer(string='Loyal Guests', default=0, readonly=True)
+
     # Currency used for monetary values, defaulting to the company's currency
     currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
 
-    @api.depends('date')
-    def _compute_rgp(self):
-        """Compute the percentage of repeated guests."""
-        for record in self:
-            reservations = self.env['hotel.reservation'].search([
-                ('check_in_date', '>=', record.oldest_check_in_date()),
-                ('check_out_date', '<=', record.date),
-            ])
-            total_reservations = len(reservations)
-            repeated_guests = len(set(reservations.mapped('guest_id')))
-            if total_reservations > 0:
-                record.repeated_guest_percentage = (repeated_guests / total_reservations) * 100
-            else:
-                record.repeated_guest_percentage = 0
-
-    @api.depends('total_room_revenue', 'total_available_rooms', 'total_other_revenue')
-    def _compute_trevpar(self):
-        """Compute Total Revenue Per Available Room (TRevPAR)."""
-        for record in self:
-            total_revenue = record.total_room_revenue + record.total_other_revenue
-            if record.total_available_rooms > 0:
-                record.trevpar = total_revenue / record.total_available_rooms
-            else:
-                record.trevpar = 0
-
-    @api.depends('date')
-    def _compute_totals(self):
-        """Compute total revenue, total available rooms, and total other revenue."""
-        for record in self:
-            reservations = self.env['hotel.reservation'].search([
-                ('check_in_date', '>=', record.oldest_check_in_date()),
-                ('check_out_date', '<=', record.date),
-                ('state', 'not in', ('draft', 'cancel')),
-            ])
-            record.total_room_revenue = sum(reservations.mapped('total_price'))
-            record.total_other_revenue = sum(reservations.mapped('services_total_price'))
-            record.total_available_rooms = self.env['hotel.room'].search_count([('state', 'in', ('available')), ])
-
-    @api.depends('total_room_revenue', 'total_available_rooms')
-    def _compute_revpar(self):
-        """Compute Revenue per Available Room (RevPAR)."""
-        for record in self:
-            if record.total_available_rooms > 0:
-                record.revpar = record.total_room_revenue / record.total_available_rooms
-            else:
-                record.revpar = 0
-
-    @api.depends('total_room_revenue', 'total_available_rooms')
-    def _compute_adr(self):
-        """Compute Average Daily Rate (ADR)."""
-        for record in self:
-            occupied_rooms = self.env['hotel.reservation'].search_count([
-                ('check_in_date', '>=', record.oldest_check_in_date()),
-                ('check_out_date', '<=', record.date),
-                ('state', 'not in', ('draft', 'cancel')), 
-            ])
-            if occupied_rooms > 0:
-                record.adr = record.total_room_revenue / occupied_rooms
-            else:
-                record.adr = 0
-
-    @api.depends('date')
-    def _compute_loyal_guests(self):
-        """Compute the number of loyal guests."""
-        self.loyal_guests = self.env['hotel.guest'].search_count([('loyalty_status', '=', True)])
-
-    @api.depends('total_available_rooms')
-    def _compute_occupancy_rate(self):
-        """Compute the occupancy rate percentage."""
-        for record in self:
-            occupied_rooms = self.env['hotel.room'].search_count([
-                ('state', 'in', ('reserved')), 
-            ])
-            if record.total_available_rooms > 0:
-                record.occupancy_rate = (occupied_rooms / record.total_available_rooms) * 100
-            else:
-                record.occupancy_rate = 0
+    _sql_constraints = [
+        ('date_uniq', 'unique(date)', 'There can only be one analysis record per day.'),
+    ]
 
     def oldest_check_in_date(self):
         """Retrieve the oldest check-in date from reservations."""
-        oldest_reservation = self.env['hotel.reservation'].search([], order='check_in_date asc', limit=1)
-        if oldest_reservation:
-            return oldest_reservation.check_in_date
-        return fields.Date.today()
+        self.env['hotel.reservation'].flush_model(['check_in_date'])
+        self.env.cr.execute("SELECT MIN(check_in_date) FROM hotel_reservation")
+        return self.env.cr.fetchone()[0] or fields.Date.today()
+
+    def _get_analysis_range(self):
+        """Return the (oldest check-in, newest check-out) pair of all reservations, or None."""
+        self.env['hotel.reservation'].flush_model(['check_in_date', 'check_out_date'])
+        self.env.cr.execute("SELECT MIN(check_in_date), MAX(check_out_date) FROM hotel_reservation")
+        date_from, date_to = self.env.cr.fetchone()
+        if not date_from:
+            return None
+        return date_from, date_to
+
+    @profiled
+    def _refresh_analysis(self, date_from, date_to):
+        """Compute the daily KPIs between two dates (inclusive) and upsert them.
+
+        Every KPI of the range is produced by a single grouped query: the
+        room-night ledger rows of the sold stays are aggregated per day and
+        the result is written with ``INSERT ... ON CONFLICT``. The cost is
+        proportional to the number of room nights in the range instead of
+        days x reservations ORM round trips.
+
+        Rooms and loyal guests only have a current count, so past days
+        already computed keep the counts they were last computed with:
+        recomputing them after a room goes under maintenance or a guest
+        becomes loyal leaves their occupancy and RevPAR unchanged.
+        """
+        if not date_from or not date_to or date_from > date_to:
+            return 0
+        self.env['hotel.reservation'].flush_model()
+        self.env['hotel.reservation.service.line'].flush_model()
+        self.env['hotel.room'].flush_model()
+        self.env['hotel.guest'].flush_model(['loyalty_status'])
+
+        total_available_rooms = self.env['hotel.room'].search_count([('state', '!=', 'under_maintenance')])
+        loyal_guests = self.env['hotel.guest'].search_count([('loyalty_status', '=', True)])
+
+        self.env.cr.execute("""
+            WITH stays AS (
+                SELECT r.id, r.check_out_date, r.check_in_date,
+                       COALESCE(room.price, 0) AS room_price,
+                       EXISTS (
+                           SELECT 1 FROM hotel_reservation p
+                            WHERE p.guest_id = r.guest_id
+                              AND p.state IN %(states)s
+                              AND (p.check_in_date, p.id) < (r.check_in_date, r.id)
+                       ) AS is_repeat
+                  FROM hotel_reservation r
+                  JOIN hotel_room room ON room.id = r.room_id
+                 WHERE r.state IN %(states)s
+                   AND r.check_in_date <= %(date_to)s
+                   AND r.check_out_date >= %(date_from)s
+            ), nights AS (
+                SELECT night.date AS day,
+                       SUM(s.room_price) AS room_revenue,
+                       COUNT(*) AS rooms_sold,
+                       COUNT(*) FILTER (WHERE s.is_repeat) AS repeat_stays
+                  FROM hotel_room_night night
+                  JOIN stays s ON s.id = night.reserv_id
+                 WHERE night.date BETWEEN %(date_from)s AND %(date_to)s
+              GROUP BY night.date
+            ), services AS (
+                SELECT s.check_out_date AS day, SUM(line.total_price) AS other_revenue
+                  FROM stays s
+                  JOIN hotel_reservation_service_line line ON line.reserv_id = s.id
+                 WHERE s.check_out_date BETWEEN %(date_from)s AND %(date_to)s
+              GROUP BY s.check_out_date
+            ), daily AS (
+                SELECT gs.day::date AS day,
+                       COALESCE(n.room_revenue, 0) AS room_revenue,
+                       COALESCE(n.rooms_sold, 0) AS rooms_sold,
+                       COALESCE(n.repeat_stays, 0) AS repeat_stays,
+                       COALESCE(sv.other_revenue, 0) AS other_revenue,
+                       CASE WHEN gs.day < %(today)s AND old.id IS NOT NULL
+                            THEN old.total_available_rooms ELSE %(available)s END AS available,
+                       CASE WHEN gs.day < %(today)s AND old.id IS NOT NULL
+                            THEN old.loyal_guests ELSE %(loyal)s END AS loyal
+                  FROM generate_series(%(date_from)s::date, %(date_to)s::date, interval '1 day') AS gs(day)
+             LEFT JOIN nights n ON n.day = gs.day::date
+             LEFT JOIN services sv ON sv.day = gs.day::date
+             LEFT JOIN hotel_analysis old ON old.date = gs.day::date
+            )
+            INSERT INTO hotel_analysis (
+                date, total_room_revenue, total_other_revenue, total_available_rooms, rooms_sold, repeat_stays,
+                revpar, adr, trevpar, occupancy_rate, repeated_guest_percentage, loyal_guests,
+                currency_id, create_uid, create_date, write_uid, write_date
+            )
+            SELECT day, room_revenue, other_revenue, available, rooms_sold, repeat_stays,
+                   CASE WHEN available > 0 THEN room_revenue / available ELSE 0 END,
+                   CASE WHEN rooms_sold > 0 THEN room_revenue / rooms_sold ELSE 0 END,
+                   CASE WHEN available > 0 THEN (room_revenue + other_revenue) / available ELSE 0 END,
+                   CASE WHEN available > 0 THEN rooms_sold * 100.0 / available ELSE 0 END,
+                   CASE WHEN rooms_sold > 0 THEN repeat_stays * 100.0 / rooms_sold ELSE 0 END,
+                   loyal, %(currency)s, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM daily
+            ON CONFLICT (date) DO UPDATE SET
+                total_room_revenue = EXCLUDED.total_room_revenue,
+                total_other_revenue = EXCLUDED.total_other_revenue,
+                total_available_rooms = EXCLUDED.total_available_rooms,
+                rooms_sold = EXCLUDED.rooms_sold,
+                repeat_stays = EXCLUDED.repeat_stays,
+                revpar = EXCLUDED.revpar,
+                adr = EXCLUDED.adr,
+                trevpar = EXCLUDED.trevpar,
+                occupancy_rate = EXCLUDED.occupancy_rate,
+                repeated_guest_percentage = EXCLUDED.repeated_guest_percentage,
+                loyal_guests = EXCLUDED.loyal_guests,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, {
+            'states': SOLD_STATES,
+            'date_from': date_from,
+            'date_to': date_to,
+            'available': total_available_rooms,
+            'loyal': loyal_guests,
+            'today': fields.Date.context_today(self),
+            'currency': self.env.company.currency_id.id,
+            'uid': self.env.uid,
+        })
+        count = self.env.cr.rowcount
+        self.invalidate_model()
+        self.env['hotel.analysis.rollup']._refresh_rollups(date_from, date_to)
+        self.env['hotel.dashboard']._invalidate_cache()
+        _logger.info("Refreshed %s analysis days from %s to %s", count, date_from, date_to)
+        return count
 
     @api.model
+    @profiled
     def update_analysis_data(self):
-        """Update analysis data for each day between the oldest and newest reservations."""
-        reservations = self.env['hotel.reservation'].search([], order='check_in_date asc')
-        if not reservations:
+        """Recompute the days recorded in the dirty-range journal.
+
+        The first run (or a run on an empty table) builds every day between
+        the oldest and newest reservations. Later runs only refresh the
+        windows touched by reservation changes, plus any new trailing days.
+        Returns the number of refreshed days.
+        """
+        journal = self.env['hotel.analysis.dirty'].sudo()
+        entries = journal.search([])
+        date_range = self._get_analysis_range()
+        self._drop_analysis_outside(date_range)
+        if not date_range:
+            entries.unlink()
+            return 0
+
+        self.env.cr.execute("SELECT MAX(date) FROM hotel_analysis")
+        last_date = self.env.cr.fetchone()[0]
+        if not last_date:
+            ranges = [date_range]
+        else:
+            ranges = [(entry.date_from, entry.date_to) for entry in entries]
+            if last_date < date_range[1]:
+                ranges.append((last_date, date_range[1]))
+
+        count = 0
+        for date_from, date_to in merge_date_ranges(ranges):
+            count += self._refresh_analysis(max(date_from, date_range[0]), min(date_to, date_range[1]))
+        entries.unlink()
+        return count
+
+
+    @api.model
+    def _drop_analysis_outside(self, date_range):
+        """Delete the analysis days outside the reservations' date range, or every day without reservations.
+
+        Deleting or cancelling the first or last reservations shrinks the
+        range, and the days left outside would otherwise keep their revenue
+        and occupancy forever.
+        """
+        if date_range:
+            self.env.cr.execute(
+                "DELETE FROM hotel_analysis WHERE date < %s OR date > %s RETURNING date", list(date_range))
+        else:
+            self.env.cr.execute("DELETE FROM hotel_analysis RETURNING date")
+        dates = [row[0] for row in self.env.cr.fetchall()]
+        if not dates:
+            return
+        self.invalidate_model()
+        self.env['hotel.analysis.rollup']._refresh_rollups(min(dates), max(dates))
+        self.env['hotel.dashboard']._invalidate_cache()
+        _logger.info("Deleted %s analysis days outside the reservations' range", len(dates))
+
+    @api.model
+    def action_open_analysis(self, period_type=None):
+        """Open the analysis at the granularity matching the history span.
+
+        An explicit ``period_type`` (argument or context) wins; otherwise
+        long histories open the yearly, monthly or weekly rollups and short
+        ones the daily rows.
+        """
+        period_type = period_type or self.env.context.get('period_type')
+        if not period_type:
+            self.env.cr.execute("SELECT MAX(date) - MIN(date) FROM hotel_analysis")
+            span = self.env.cr.fetchone()[0] or 0
+            if span > 3 * 365:
+                period_type = 'yearly'
+            elif span > 365:
+                period_type = 'monthly'
+            elif span > 90:
+                period_type = 'weekly'
+            else:
+                period_type = 'daily'
+        if period_type not in ROLLUP_PERIODS:
+            return self.env['ir.actions.actions']._for_xml_id('hotel_manager.action_hotel_analysis_dashboard')
+        action = self.env['ir.actions.actions']._for_xml_id('hotel_manager.action_hotel_analysis_rollup')
+        groupby = f"period_start:{ROLLUP_PERIODS[period_type]}"
+        action['domain'] = [('period_type', '=', period_type)]
+        action['context'] = {
+            'period_type': period_type,
+            'graph_groupbys': [groupby],
+            'pivot_row_groupby': [groupby],
+        }
+        return action
+
+
+class HotelAnalysisRollup(models.Model):
+    _name = 'hotel.analysis.rollup'
+    _description = 'Hotel Analysis Rollup'
+    _order = 'period_type, period_start'
+
+    # Granularity and first day of the period
+    period_type = fields.Selection([
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+        ('yearly', 'Yearly'),
+    ], string='Period Type', required=True, readonly=True)
+    period_start = fields.Date(string='Period', required=True, readonly=True)
+
+    # Number of daily analysis rows in the period
+    days = fields.Integer(string='Days', readonly=True)
+
+    # Additive numerators and denominators, summed from the daily rows
+    total_room_revenue = fields.Monetary(string='Total Room Revenue', currency_field='currency_id', readonly=True)
+    total_other_revenue = fields.Monetary(string='Total Other Revenue', currency_field='currency_id', readonly=True)
+    rooms_sold = fields.Integer(string='Rooms Sold', readonly=True)
+    repeat_stays = fields.Integer(string='Repeat Stays', readonly=True)
+    available_room_nights = fields.Integer(string='Available Room Nights', readonly=True)
+
+    # Ratio KPIs, derived from the summed numerators and denominators. Grouped
+    # values are recomputed from the groups' sums by read_group, as the
+    # average of ratios is not the ratio over the periods
+    revpar = fields.Monetary(string='RevPAR', currency_field='currency_id', readonly=True, group_operator='max')
+    adr = fields.Monetary(string='ADR', currency_field='currency_id', readonly=True, group_operator='max')
+    trevpar = fields.Monetary(string='TRevPAR', currency_field='currency_id', readonly=True, group_operator='max')
+    occupancy_rate = fields.Float(string='Occupancy Rate (%)', readonly=True, group_operator='max')
+    repeated_guest_percentage = fields.Float(string='Repeated Guest Percentage (%)', readonly=True, group_operator='max')
+
+    # Number of loyal guests on the last day of the period
+    loyal_guests = fields.Integer(string='Loyal Guests', readonly=True, group_operator='max')
+
+    currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+
+    _sql_constraints = [
+        ('period_uniq', 'unique(period_type, period_start)', 'There can only be one rollup per period.'),
+    ]
+
+    @api.model
+    def read_group(self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True):
+        """Compute the grouped ratio KPIs from the sums of their numerators and denominators."""
+        ratios = [spec.split(':')[0] for spec in fields if spec.split(':')[0] in ROLLUP_RATIOS]
+        if not ratios:
+            return super(HotelAnalysisRollup, self).read_group(domain, fields, groupby, offset, limit, orderby, lazy)
+        sums = {name for ratio in ratios for name in ROLLUP_RATIOS[ratio][0] + (ROLLUP_RATIOS[ratio][1],)}
+        requested = {spec.split(':')[0] for spec in fields}
+        fields = list(fields) + [f'{name}:sum' for name in sums - requested]
+        groups = super(HotelAnalysisRollup, self).read_group(domain, fields, groupby, offset, limit, orderby, lazy)
+        for group in groups:
+            for ratio in ratios:
+                numerators, denominator, factor = ROLLUP_RATIOS[ratio]
+                total = group.get(denominator) or 0
+                group[ratio] = factor * sum(group.get(name) or 0 for name in numerators) / total if total else 0
+        return groups
+
+    @api.model
+    def _refresh_rollups(self, date_from, date_to):
+        """Recompute the weekly, monthly and yearly rollups of the periods overlapping a date range."""
+        for period_type, unit in ROLLUP_PERIODS.items():
+            # Periods whose daily rows were all deleted
+            self.env.cr.execute("""
+                DELETE FROM hotel_analysis_rollup r
+                 WHERE period_type = %(period_type)s
+                   AND period_start >= date_trunc(%(unit)s, %(date_from)s::date)
+                   AND period_start <= %(date_to)s
+                   AND NOT EXISTS (
+                       SELECT 1 FROM hotel_analysis a
+                        WHERE a.date >= r.period_start
+                          AND a.date < r.period_start + ('1 ' || %(unit)s)::interval
+                   )
+            """, {'period_type': period_type, 'unit': unit, 'date_from': date_from, 'date_to': date_to})
+            self.env.cr.execute("""
+                INSERT INTO hotel_analysis_rollup (
+                    period_type, period_start, days, total_room_revenue, total_other_revenue,
+                    rooms_sold, repeat_stays, available_room_nights,
+                    revpar, adr, trevpar, occupancy_rate, repeated_guest_percentage, loyal_guests,
+                    currency_id, create_uid, create_date, write_uid, write_date
+                )
+                SELECT %(period_type)s, period_start, days, room_revenue, other_revenue,
+                       rooms_sold, repeat_stays, available,
+                       CASE WHEN available > 0 THEN room_revenue / available ELSE 0 END,
+                       CASE WHEN rooms_sold > 0 THEN room_revenue / rooms_sold ELSE 0 END,
+                       CASE WHEN available > 0 THEN (room_revenue + other_revenue) / available ELSE 0 END,
+                       CASE WHEN available > 0 THEN rooms_sold * 100.0 / available ELSE 0 END,
+                       CASE WHEN rooms_sold > 0 THEN repeat_stays * 100.0 / rooms_sold ELSE 0 END,
+                       loyal_guests, %(currency)s, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM (
+                      SELECT date_trunc(%(unit)s, date)::date AS period_start,
+                             COUNT(*) AS days,
+                             SUM(total_room_revenue) AS room_revenue,
+                             SUM(total_other_revenue) AS other_revenue,
+                             SUM(rooms_sold) AS rooms_sold,
+                             COALESCE(SUM(repeat_stays), 0) AS repeat_stays,
+                             SUM(total_available_rooms) AS available,
+                             (array_agg(loyal_guests ORDER BY date DESC))[1] AS loyal_guests
+                        FROM hotel_analysis
+                       WHERE date >= date_trunc(%(unit)s, %(date_from)s::date)
+                         AND date < date_trunc(%(unit)s, %(date_to)s::date) + ('1 ' || %(unit)s)::interval
+                    GROUP BY 1
+                  ) periods
+                ON CONFLICT (period_type, period_start) DO UPDATE SET
+                    days = EXCLUDED.days,
+                    total_room_revenue = EXCLUDED.total_room_revenue,
+                    total_other_revenue = EXCLUDED.total_other_revenue,
+                    rooms_sold = EXCLUDED.rooms_sold,
+                    repeat_stays = EXCLUDED.repeat_stays,
+                    available_room_nights = EXCLUDED.available_room_nights,
+                    revpar = EXCLUDED.revpar,
+                    adr = EXCLUDED.adr,
+                    trevpar = EXCLUDED.trevpar,
+                    occupancy_rate = EXCLUDED.occupancy_rate,
+                    repeated_guest_percentage = EXCLUDED.repeated_guest_percentage,
+                    loyal_guests = EXCLUDED.loyal_guests,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date
+            """, {
+                'period_type': period_type,
+                'unit': unit,
+                'date_from': date_from,
+                'date_to': date_to,
+                'currency': self.env.company.currency_id.id,
+                'uid': self.env.uid,
+            })
+        self.invalidate_model()
+
+
+class HotelAnalysisDirty(models.Model):
+    _name = 'hotel.analysis.dirty'
+    _description = 'Hotel Analysis Dirty Range'
+    _order = 'date_from'
+
+    # First and last day whose analysis rows must be recomputed
+    date_from = fields.Date(string='From', required=True)
+    date_to = fields.Date(string='To', required=True)
+
+    def init(self):
+        # Rebuild the existing history once when the rollups are introduced on a populated database
+        self._cr.execute("SELECT 1 FROM hotel_analysis_rollup LIMIT 1")
+        if self._cr.fetchone():
             return
+        self._cr.execute("SELECT MIN(date), MAX(date) FROM hotel_analysis")
+        date_from, date_to = self._cr.fetchone()
+        if date_from:
+            self.mark_ranges([(date_from, date_to)])
+
+    @api.model
+    def mark_ranges(self, ranges):
+        """Record the given (date_from, date_to) pairs for the next analysis run."""
+        merged = merge_date_ranges(ranges)
+        if merged:
+            self.sudo().create([{'date_from': date_from, 'date_to': date_to} for date_from, date_to in merged])
 
-        oldest_date = reservations[0].check_in_date
-        newest_date = reservations[-1].check_out_date
 
-        current_date = oldest_date
+class HotelNpsStat(models.Model):
+    _name = 'hotel.nps.stat'
+    _description = 'Hotel NPS Statistics'
+    _order = 'date, capacity'
+    _log_access = False
 
-        while current_date <= newest_date:
-            existing_record = self.search([('date', '=', current_date)], limit=1)
-            
-            if not existing_record:
-                new_record = self.create({
-                    'date': current_date,  
-                })
-                new_record._compute_rgp()
-                new_record._compute_totals()
-                new_record._compute_revpar()
-                new_record._compute_adr()
-                new_record._compute_loyal_guests()
-                new_record._compute_occupancy_rate()
-                new_record._compute_trevpar()
+    # Check-out day of the scored stays and capacity of their room, used as the room type
+    date = fields.Date(string='Date', required=True, readonly=True)
+    capacity = fields.Integer(string='Room Capacity', required=True, readonly=True)
 
-            current_date += timedelta(days=1)
+    promoters = fields.Integer(string='Promoters', readonly=True)
+    neutrals = fields.Integer(string='Neutrals', readonly=True)
+    detractors = fields.Integer(string='Detractors', readonly=True)
+    responses = fields.Integer(string='Responses', readonly=True)
 
+    _sql_constraints = [
+        ('date_capacity_uniq', 'unique(date, capacity)', 'There can only be one NPS row per day and room capacity.'),
+    ]
 
+    def init(self):
+        # Backfill the statistics the first time the module is upgraded on existing data
+        self._cr.execute("SELECT 1 FROM hotel_nps_stat LIMIT 1")
+        if not self._cr.fetchone():
+            self._refresh_stats()
 
+    @api.model
+    def _refresh_stats(self, keys=None):
+        """Recount the scored stays of the given (date, capacity) keys, or of every key.
+
+        Each key is recounted from the reservations checking out that day, so
+        re-scored, moved and deleted reservations are reflected whatever
+        their previous score.
+        """
+        if keys is not None:
+            keys = {(day, capacity) for day, capacity in keys if day and capacity is not None}
+            if not keys:
+                return
+        self.env['hotel.reservation'].flush_model(['nps_score', 'check_out_date', 'room_id'])
+        self.env['hotel.room'].flush_model(['capacity'])
+        params = {}
+        if keys is None:
+            key_filter = ""
+            targets = "SELECT DISTINCT check_out_date, capacity FROM scores"
+        else:
+            dates, capacities = zip(*keys)
+            params = {'dates': list(dates), 'capacities': list(capacities)}
+            key_filter = "JOIN unnest(%(dates)s::date[], %(capacities)s::int[]) AS k(day, capacity) ON k.day = r.check_out_date AND k.capacity = room.capacity"
+            targets = "SELECT * FROM unnest(%(dates)s::date[], %(capacities)s::int[])"
+        self.env.cr.execute(f"""
+            WITH scores AS (
+                SELECT r.check_out_date, room.capacity, r.nps_score
+                  FROM hotel_reservation r
+                  JOIN hotel_room room ON room.id = r.room_id
+                  {key_filter}
+                 WHERE r.nps_score BETWEEN 0 AND 10
+            ),
+            targets(day, capacity) AS ({targets})
+            INSERT INTO hotel_nps_stat (date, capacity, promoters, neutrals, detractors, responses)
+            SELECT t.day, t.capacity,
+                   COUNT(s.nps_score) FILTER (WHERE s.nps_score >= 9),
+                   COUNT(s.nps_score) FILTER (WHERE s.nps_score >= 7 AND s.nps_score < 9),
+                   COUNT(s.nps_score) FILTER (WHERE s.nps_score < 7),
+                   COUNT(s.nps_score)
+              FROM targets t
+         LEFT JOIN scores s ON s.check_out_date = t.day AND s.capacity = t.capacity
+          GROUP BY t.day, t.capacity
+            ON CONFLICT (date, capacity) DO UPDATE
+               SET promoters = EXCLUDED.promoters,
+                   neutrals = EXCLUDED.neutrals,
+                   detractors = EXCLUDED.detractors,
+                   responses = EXCLUDED.responses
+        """, params)
+        self.env.cr.execute("DELETE FROM hotel_nps_stat WHERE responses = 0")
+        self.invalidate_model()
+
+    @api.model
+    def get_nps_summary(self, date_from=None, date_to=None, capacity=None):
+        """Return the promoters, neutrals, detractors and responses of the stays checked out in a period."""
+        domain = []
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        if capacity is not None:
+            domain.append(('capacity', '=', capacity))
+        [(promoters, neutrals, detractors, responses)] = self.sudo()._read_group(
+            domain, [], ['promoters:sum', 'neutrals:sum', 'detractors:sum', 'responses:sum'],
+        )
+        return {
+            'promoters': promoters or 0,
+            'neutrals': neutrals or 0,
+            'detractors': detractors or 0,
+            'responses': responses or 0,
+        }
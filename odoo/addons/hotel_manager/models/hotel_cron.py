@@ -0,0 +1,137 @@
+from odoo import models, fields, api
+from datetime import datetime, timedelta
+import time
+import logging
+_logger = logging.getLogger(__name__)
+
+# Scheduled jobs run through hotel.cron.run, with the model and method doing the work
+CRON_JOBS = {
+    'room_states': ('hotel.reservation', 'make_rooms_available'),
+    'analysis': ('hotel.analysis', 'update_analysis_data'),
+    'loyalty': ('hotel.guest', 'update_loyalty_status'),
+}
+
+# Days of run history kept for tuning
+RUN_RETENTION_DAYS = 30
+
+class HotelCronRun(models.Model):
+    _name = 'hotel.cron.run'
+    _description = 'Hotel Scheduled Job Run'
+    _order = 'date_start desc, id desc'
+
+    job = fields.Selection([
+        ('room_states', 'Room States'),
+        ('analysis', 'Analysis'),
+        ('loyalty', 'Loyalty'),
+    ], string='Job', required=True, index=True, readonly=True)
+    date_start = fields.Datetime(string='Started', required=True, readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True, digits=(16, 3))
+    rows = fields.Integer(string='Rows Processed', readonly=True)
+    watermark = fields.Char(string='Watermark', readonly=True)
+    state = fields.Selection([('done', 'Done'), ('failed', 'Failed')], string='Status', required=True, readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.model
+    def _run_job(self, job):
+        """Run a scheduled job unless it has nothing to do, already runs, or is backed off.
+
+        A run is skipped when its inputs have not changed since the watermark
+        of the last successful run, deferred during the peak hours of the
+        ``hotel_manager.cron_peak_hours`` system parameter (e.g. ``8-11,17-20``)
+        until ``hotel_manager.cron_peak_interval`` minutes have passed, and
+        never overlaps another run of the same job thanks to an advisory lock.
+        Executed runs are recorded with their duration and the number of rows
+        the job reports as processed.
+        """
+        model_name, method = CRON_JOBS[job]
+        watermark, pending = self._get_job_inputs(job)
+        last_run = self.search([('job', '=', job), ('state', '=', 'done')], limit=1)
+        if last_run and not pending and last_run.watermark == watermark:
+            _logger.debug("Skipping %s: nothing changed since %s", job, last_run.date_start)
+            return
+        if last_run and self._is_peak_hour():
+            interval = int(self.env['ir.config_parameter'].sudo().get_param('hotel_manager.cron_peak_interval', 15))
+            if fields.Datetime.now() - last_run.date_start < timedelta(minutes=interval):
+                _logger.debug("Deferring %s during peak hours", job)
+                return
+
+        # Session level so the lock survives the intermediate commits of chunked jobs
+        self.env.cr.execute("SELECT pg_try_advisory_lock(hashtext(%s))", ['hotel_manager.cron.' + job])
+        if not self.env.cr.fetchone()[0]:
+            _logger.info("Skipping %s: another run is in progress", job)
+            return
+        date_start = fields.Datetime.now()
+        start = time.perf_counter()
+        try:
+            rows = getattr(self.env[model_name], method)() or 0
+        except Exception as e:
+            # The failed transaction must be rolled back before the lock can be released
+            self.env.cr.rollback()
+            self._unlock_job(job)
+            self._record_failure(job, date_start, time.perf_counter() - start, pending, str(e))
+            raise
+        self._unlock_job(job)
+        duration = time.perf_counter() - start
+        _logger.info("Job %s processed %s rows in %.2fs", job, rows, duration)
+        self.sudo().create({
+            'job': job,
+            'date_start': date_start,
+            'duration': duration,
+            'rows': rows,
+            'watermark': watermark,
+            'state': 'done',
+        })
+
+    @api.model
+    def _unlock_job(self, job):
+        self.env.cr.execute("SELECT pg_advisory_unlock(hashtext(%s))", ['hotel_manager.cron.' + job])
+
+    @api.model
+    def _get_job_inputs(self, job):
+        """Return the (watermark, pending rows) of a job.
+
+        The watermark is the date a job's output depends on, the pending rows
+        are the journal entries or flagged records waiting to be processed.
+        """
+        today = fields.Date.context_today(self)
+        if job == 'analysis':
+            self.env['hotel.analysis.dirty'].flush_model()
+            self.env.cr.execute("SELECT COUNT(*) FROM hotel_analysis_dirty")
+            return str(today), self.env.cr.fetchone()[0]
+        if job == 'loyalty':
+            self.env['hotel.guest'].flush_model(['loyalty_dirty'])
+            self.env.cr.execute("SELECT COUNT(*) FROM hotel_guest WHERE loyalty_dirty")
+            return str(today.year), self.env.cr.fetchone()[0]
+        return str(today), 0
+
+    @api.model
+    def _is_peak_hour(self):
+        peak_hours = self.env['ir.config_parameter'].sudo().get_param('hotel_manager.cron_peak_hours', '')
+        hour = fields.Datetime.context_timestamp(self, datetime.now()).hour
+        for span in filter(None, peak_hours.replace(' ', '').split(',')):
+            try:
+                first, last = (int(bound) for bound in span.split('-'))
+            except ValueError:
+                _logger.warning("Ignoring invalid peak hours span %r", span)
+                continue
+            if first <= hour <= last:
+                return True
+        return False
+
+    @api.model
+    def _record_failure(self, job, date_start, duration, rows, error):
+        # Written on its own cursor so the run is kept when the job rolls back
+        with self.env.registry.cursor() as cr:
+            self.with_env(self.env(cr=cr)).sudo().create({
+                'job': job,
+                'date_start': date_start,
+                'duration': duration,
+                'rows': rows,
+                'state': 'failed',
+                'error': error,
+            })
+
+    @api.autovacuum
+    def _gc_runs(self):
+        limit = fields.Datetime.now() - timedelta(days=RUN_RETENTION_DAYS)
+        self.sudo().search([('date_start', '<', limit)]).unlink()
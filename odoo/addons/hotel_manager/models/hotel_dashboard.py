@@ -0,0 +1,139 @@
+from odoo import models, fields, api
+from odoo.tools.lru import LRU
+from .hotel_perf import profiled
+import time
+import logging
+_logger = logging.getLogger(__name__)
+
+# Dashboard payloads shared by all the requests of this worker, least recently used evicted first
+_cache = LRU(128)
+
+# Default lifetime in seconds of a cached payload
+CACHE_TTL = 300
+
+class HotelDashboard(models.AbstractModel):
+    _name = 'hotel.dashboard'
+    _description = 'Hotel Dashboard'
+
+    def init(self):
+        # Bumped after every commit touching the dashboard inputs, shared by all workers
+        self._cr.execute("CREATE SEQUENCE IF NOT EXISTS hotel_dashboard_cache_seq")
+
+    @api.model
+    @profiled
+    def get_dashboard_data(self):
+        """Return every aggregate displayed by the hotel.dashboard client action.
+
+        Payloads are cached per database, company, day and analysis access.
+        A cached payload is served until its TTL expires or until a
+        reservation, room, service or analysis change is committed. Users
+        without read access to reservations are refused before the cache
+        is looked up.
+        """
+        self.env['hotel.reservation'].check_access_rights('read')
+        self.env.cr.execute("SELECT last_value FROM hotel_dashboard_cache_seq")
+        generation = self.env.cr.fetchone()[0]
+        key = (
+            self.env.cr.dbname,
+            self.env.company.id,
+            fields.Date.context_today(self),
+            self.env['hotel.analysis'].check_access_rights('read', raise_exception=False),
+        )
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param('hotel_manager.dashboard_cache_ttl', CACHE_TTL))
+        cached = _cache.get(key)
+        if cached and cached[0] == generation and time.monotonic() - cached[1] < ttl:
+            return cached[2]
+        data = self._compute_dashboard_data()
+        _cache[key] = (generation, time.monotonic(), data)
+        return data
+
+    @api.model
+    def _invalidate_cache(self):
+        """Invalidate the cached dashboards of every worker once the current transaction commits."""
+        data = self.env.cr.postcommit.data
+        if data.get('hotel_dashboard.invalidate'):
+            return
+        data['hotel_dashboard.invalidate'] = True
+        registry = self.env.registry
+
+        @self.env.cr.postcommit.add
+        def bump_generation():
+            with registry.cursor() as cr:
+                cr.execute("SELECT nextval('hotel_dashboard_cache_seq')")
+
+    @api.model
+    @profiled
+    def _compute_dashboard_data(self):
+        """Compute the dashboard aggregates.
+
+        Counts are computed in the database, so the payload has a constant
+        size whatever the reservation history.
+        """
+        return {
+            'company': {'name': self.env.company.name},
+            'reservations': self._get_reservation_data(),
+            'nps': self.env['hotel.nps.stat'].get_nps_summary(),
+            'rooms': self._get_rooms_data(),
+            'services': self._get_services_data(),
+            'analysis': self._get_analysis_data(),
+        }
+
+    @api.model
+    def _get_reservation_data(self):
+        """Counters of the active reservations, from a single filtered aggregate."""
+        Reservation = self.env['hotel.reservation']
+        Reservation.check_access_rights('read')
+        Reservation.flush_model(['check_in_date', 'check_out_date', 'active'])
+        self.env.cr.execute("""
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE check_in_date = %(today)s),
+                   COUNT(*) FILTER (WHERE check_out_date = %(today)s),
+                   COUNT(*) FILTER (WHERE check_in_date <= %(today)s AND check_out_date >= %(today)s)
+              FROM hotel_reservation
+             WHERE active
+        """, {'today': fields.Date.context_today(self)})
+        count, check_ins, check_outs, stays = self.env.cr.fetchone()
+        return {
+            'count': count,
+            'check_ins': check_ins,
+            'check_outs': check_outs,
+            'stays': stays,
+        }
+
+    @api.model
+    def _get_rooms_data(self):
+        """Number of rooms per state."""
+        rooms = {'available': 0, 'reserved': 0, 'under_maintenance': 0}
+        for state, count in self.env['hotel.room']._read_group([], ['state'], ['__count']):
+            if state in rooms:
+                rooms[state] = count
+        return rooms
+
+    @api.model
+    def _get_services_data(self):
+        """Number of reservations using each service."""
+        self.env['hotel.reservation'].check_access_rights('read')
+        self.env['hotel.reservation'].flush_model(['service_ids'])
+        self.env.cr.execute("""
+            SELECT service_id, COUNT(*)
+              FROM hotel_reservation_service_rel
+          GROUP BY service_id
+        """)
+        usage = dict(self.env.cr.fetchall())
+        services = self.env['hotel.services'].search_read([], ['service_id'], order='id')
+        return [{
+            'id': service['id'],
+            'name': service['service_id'],
+            'count': usage.get(service['id'], 0),
+        } for service in services]
+
+    @api.model
+    def _get_analysis_data(self):
+        """KPIs of the latest analysis day up to today, if the user may read them."""
+        Analysis = self.env['hotel.analysis']
+        if not Analysis.check_access_rights('read', raise_exception=False):
+            return {}
+        kpi_fields = ['revpar', 'adr', 'occupancy_rate', 'loyal_guests']
+        today = fields.Date.context_today(self)
+        latest = Analysis.search_read([('date', '<=', today)], kpi_fields, order='date desc', limit=1)
+        return latest[0] if latest else {}
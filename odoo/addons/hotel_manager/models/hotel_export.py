@@ -0,0 +1,174 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from datetime import timedelta
+from decimal import Decimal
+import csv
+import os
+import time
+import logging
+_logger = logging.getLogger(__name__)
+
+# Models exported to the BI warehouse, with all their stored columns
+EXPORT_MODELS = [
+    'hotel.reservation',
+    'hotel.reservation.service.line',
+    'hotel.reservation.guest.line',
+    'hotel.analysis',
+]
+
+# Incremental exports re-read this many minutes before the watermark, so rows
+# committed late by transactions that started earlier are not missed;
+# consumers upsert on id
+EXPORT_OVERLAP = 10
+
+class HotelExport(models.AbstractModel):
+    _name = 'hotel.export'
+    _description = 'Hotel Data Export'
+
+    @api.model
+    def _export_data(self, model_names=None, file_format='csv', incremental=True, batch_size=10000):
+        """Stream the rows of the exported models to one CSV or Parquet file per model.
+
+        Rows are read through a named server-side cursor ``batch_size`` at a
+        time and written out right away, so memory is bounded by one batch
+        whatever the table size. With ``incremental`` only the rows written
+        since the model's watermark (``hotel_manager.export_watermark.<model>``
+        system parameter) are exported, and the watermark is advanced.
+        Files go to the directory of the ``hotel_manager.export_directory``
+        system parameter only, never one given by the caller. Parquet needs
+        pyarrow. Returns the file, rows and throughput per model.
+        """
+        directory = self.env['ir.config_parameter'].sudo().get_param('hotel_manager.export_directory')
+        if not directory:
+            raise UserError(_("Set the hotel_manager.export_directory parameter to export data."))
+        if file_format not in ('csv', 'parquet'):
+            raise UserError(_("Unsupported export format %s, use csv or parquet.", file_format))
+        if file_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise UserError(_("Parquet exports require the pyarrow Python package."))
+        os.makedirs(directory, exist_ok=True)
+        self.env.flush_all()
+        return [
+            self._export_model(model_name, directory, file_format, incremental, batch_size)
+            for model_name in (model_names or EXPORT_MODELS)
+        ]
+
+    @api.model
+    def _export_model(self, model_name, directory, file_format, incremental, batch_size):
+        Model = self.env[model_name]
+        Model.check_access_rights('read')
+        columns = [
+            name for name, field in Model._fields.items()
+            if field.store and field.column_type
+        ]
+        params = self.env['ir.config_parameter'].sudo()
+        watermark_key = f'hotel_manager.export_watermark.{model_name}'
+        watermark = incremental and params.get_param(watermark_key)
+        where, args = "", []
+        if watermark:
+            where = "WHERE write_date > %s"
+            args = [fields.Datetime.from_string(watermark) - timedelta(minutes=EXPORT_OVERLAP)]
+
+        stamp = fields.Datetime.now().strftime('%Y%m%d%H%M%S')
+        path = os.path.join(directory, f'{Model._table}_{stamp}.{file_format}')
+        quoted = ', '.join(f'"{column}"' for column in columns)
+        start = time.perf_counter()
+        rows = 0
+        last_write = None
+        write_index = columns.index('write_date')
+
+        writer = self._open_writer(path, file_format, Model, columns)
+        # Unordered, so the export never sorts the table; the watermark is the latest write seen
+        stream = self.env.cr._cnx.cursor(f'hotel_export_{Model._table}')
+        try:
+            stream.execute(f'SELECT {quoted} FROM "{Model._table}" {where}', args)
+            while True:
+                batch = stream.fetchmany(batch_size)
+                if not batch:
+                    break
+                writer.write(batch)
+                rows += len(batch)
+                last_write = max(filter(None, [last_write] + [row[write_index] for row in batch]), default=None)
+        finally:
+            stream.close()
+            writer.close()
+
+        if incremental and last_write:
+            params.set_param(watermark_key, fields.Datetime.to_string(last_write))
+        seconds = time.perf_counter() - start
+        _logger.info("Exported %s %s rows to %s in %.2fs (%.0f rows/s)",
+                     rows, model_name, path, seconds, rows / seconds if seconds else 0)
+        return {
+            'model': model_name,
+            'path': path,
+            'rows': rows,
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+            'watermark': fields.Datetime.to_string(last_write) if last_write else watermark or None,
+        }
+
+    @api.model
+    def _open_writer(self, path, file_format, Model, columns):
+        if file_format == 'parquet':
+            return ParquetWriter(path, Model, columns)
+        return CsvWriter(path, columns)
+
+    @api.model
+    def _cron_export(self):
+        """Nightly incremental export to the hotel_manager.export_directory in the format of hotel_manager.export_format."""
+        file_format = self.env['ir.config_parameter'].sudo().get_param('hotel_manager.export_format', 'csv')
+        self._export_data(file_format=file_format)
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Write row batches as the row groups of a Parquet file, typed from the Odoo fields."""
+
+    def __init__(self, path, Model, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {
+            'boolean': pa.bool_(),
+            'integer': pa.int64(),
+            'many2one': pa.int64(),
+            'many2one_reference': pa.int64(),
+            'float': pa.float64(),
+            'monetary': pa.float64(),
+            'date': pa.date32(),
+            'datetime': pa.timestamp('us'),
+        }
+        self.pa = pa
+        self.columns = columns
+        # Numeric columns come back as Decimal
+        self.decimals = {index for index, column in enumerate(columns) if Model._fields[column].type in ('float', 'monetary')}
+        self.schema = pa.schema([(column, types.get(Model._fields[column].type, pa.string())) for column in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        arrays = []
+        for index, column in enumerate(self.columns):
+            values = [row[index] for row in rows]
+            if index in self.decimals:
+                values = [float(value) if isinstance(value, Decimal) else value for value in values]
+            elif self.schema.field(column).type == self.pa.string():
+                values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+            arrays.append(self.pa.array(values, type=self.schema.field(column).type))
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
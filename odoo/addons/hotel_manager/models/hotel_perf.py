@@ -0,0 +1,104 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import functools
+import random
+import threading
+import time
+import logging
+_logger = logging.getLogger(__name__)
+
+# Samples waiting to be written, per database
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+# A buffer is written once it holds this many samples or is this many seconds old
+FLUSH_SIZE = 100
+FLUSH_DELAY = 60
+
+# Days of samples kept
+STAT_RETENTION_DAYS = 30
+
+
+def profiled(method):
+    """Record the wall time, SQL queries and records of a sampled share of the calls to ``method``.
+
+    The share is the ``hotel_manager.perf_sample_rate`` system parameter,
+    between 0 (default, disabled) and 1 (every call). Samples are buffered
+    per worker and written to hotel.perf.stat on a separate cursor.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        rate = float(self.env['ir.config_parameter'].sudo().get_param('hotel_manager.perf_sample_rate', 0) or 0)
+        if not rate or random.random() >= rate:
+            return method(self, *args, **kwargs)
+        cr = self.env.cr
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _add_sample(self.env.registry, {
+                'method': f'{self._name}.{method.__name__}',
+                'date': fields.Datetime.now(),
+                'duration': (time.perf_counter() - start) * 1000,
+                'query_count': cr.sql_log_count - queries,
+                'records': len(self),
+            })
+    return wrapper
+
+
+def _add_sample(registry, sample):
+    with _buffers_lock:
+        buffer = _buffers.setdefault(registry.db_name, {'samples': [], 'since': time.monotonic()})
+        buffer['samples'].append(sample)
+        if len(buffer['samples']) < FLUSH_SIZE and time.monotonic() - buffer['since'] < FLUSH_DELAY:
+            return
+        samples = buffer['samples']
+        _buffers[registry.db_name] = {'samples': [], 'since': time.monotonic()}
+    try:
+        with registry.cursor() as cr:
+            api.Environment(cr, api.SUPERUSER_ID, {})['hotel.perf.stat'].create(samples)
+    except Exception:
+        # Losing samples must never break the profiled call
+        _logger.warning("Could not write %s performance samples", len(samples), exc_info=True)
+
+
+class HotelPerfStat(models.Model):
+    _name = 'hotel.perf.stat'
+    _description = 'Hotel Performance Sample'
+    _order = 'date desc, id desc'
+    _log_access = False
+
+    method = fields.Char(string='Method', required=True, index=True, readonly=True)
+    date = fields.Datetime(string='Date', required=True, index=True, readonly=True)
+    duration = fields.Float(string='Duration (ms)', readonly=True, digits=(16, 2), group_operator='avg')
+    query_count = fields.Integer(string='SQL Queries', readonly=True, group_operator='avg')
+    records = fields.Integer(string='Records', readonly=True)
+
+    @api.model
+    def get_summary(self, date_from=None, date_to=None, method=None):
+        """Return the call count, average and maximum duration, average queries and records per method."""
+        domain = []
+        if date_from:
+            domain.append(('date', '>=', date_from))
+        if date_to:
+            domain.append(('date', '<=', date_to))
+        if method:
+            domain.append(('method', '=', method))
+        groups = self._read_group(
+            domain, ['method'],
+            ['__count', 'duration:avg', 'duration:max', 'query_count:avg', 'records:sum'],
+        )
+        return [{
+            'method': method,
+            'calls': calls,
+            'avg_duration': avg_duration,
+            'max_duration': max_duration,
+            'avg_queries': avg_queries,
+            'records': records,
+        } for method, calls, avg_duration, max_duration, avg_queries, records in groups]
+
+    @api.autovacuum
+    def _gc_stats(self):
+        limit = fields.Datetime.now() - timedelta(days=STAT_RETENTION_DAYS)
+        self.env.cr.execute("DELETE FROM hotel_perf_stat WHERE date < %s", [limit])
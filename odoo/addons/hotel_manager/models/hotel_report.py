@@ -0,0 +1,131 @@
+from odoo import models, fields, api, _
+import tempfile
+import zipfile
+import hashlib
+import shutil
+import base64
+import time
+import os
+import logging
+_logger = logging.getLogger(__name__)
+
+# Default number of reservations rendered per PDF of a batch
+REPORT_CHUNK_SIZE = 100
+
+# Bytes read at a time when hashing and copying an archive to the filestore
+COPY_BUFFER_SIZE = 1024 * 1024
+
+class HotelReportBatch(models.Model):
+    _name = 'hotel.report.batch'
+    _description = 'Reservation Report Batch'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True, readonly=True)
+    reservation_ids = fields.Many2many('hotel.reservation', string='Reservations', readonly=True)
+    reservation_count = fields.Integer(string='Reservations Count', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, readonly=True)
+    report_file = fields.Binary(string='Reports', attachment=True, readonly=True)
+    report_filename = fields.Char(string='File Name', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True, digits=(16, 2))
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.model
+    def _create_batch(self, reservations):
+        return self.create({
+            'name': _('%s reservation reports', len(reservations)),
+            'reservation_ids': [(6, 0, reservations.ids)],
+            'reservation_count': len(reservations),
+        })
+
+    def _render(self, chunk_size=None):
+        """Render the reservation reports of each batch into a zip of PDFs.
+
+        Reservations are rendered ``chunk_size`` at a time (default the
+        ``hotel_manager.report_chunk_size`` system parameter) and each chunk's
+        PDF is written to a temporary zip file right away, which is then
+        copied to the filestore by blocks, so memory holds a single chunk
+        whatever the size of the batch.
+        """
+        chunk_size = int(chunk_size or self.env['ir.config_parameter'].sudo().get_param(
+            'hotel_manager.report_chunk_size', REPORT_CHUNK_SIZE))
+        Report = self.env['ir.actions.report']
+        for batch in self:
+            start = time.perf_counter()
+            reservation_ids = batch.reservation_ids.sorted('reserv_id').ids
+            with tempfile.TemporaryFile() as archive_file:
+                with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    for index in range(0, len(reservation_ids), chunk_size):
+                        chunk = self.env['hotel.reservation'].browse(reservation_ids[index:index + chunk_size])
+                        pdf, _format = Report._render_qweb_pdf('hotel_manager.report_reservation', chunk.ids)
+                        archive.writestr(f'reservations_{chunk[0].reserv_id}_{chunk[-1].reserv_id}.pdf', pdf)
+                        # Drop the rendered chunk's records from the cache before the next one
+                        self.env.invalidate_all()
+                batch._store_report_file(archive_file)
+            duration = time.perf_counter() - start
+            batch.write({
+                'state': 'done',
+                'report_filename': f'reservation_reports_{batch.id}.zip',
+                'duration': duration,
+                'error': False,
+            })
+            _logger.info("Rendered %s reservation reports in %.2fs (%.1f pages/s)",
+                         len(reservation_ids), duration, len(reservation_ids) / duration if duration else 0)
+
+    def _store_report_file(self, archive_file):
+        """Store the zip in ``archive_file`` as the report_file attachment of this batch.
+
+        With the default filestore storage the file is hashed and copied by
+        blocks, never loaded whole in memory. Database storage needs the
+        whole content and goes through the field.
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        archive_file.seek(0)
+        if Attachment._storage() != 'file':
+            self.report_file = base64.b64encode(archive_file.read())
+            return
+        Attachment.search([
+            ('res_model', '=', self._name), ('res_field', '=', 'report_file'), ('res_id', '=', self.id),
+        ]).unlink()
+        sha = hashlib.sha1()
+        for block in iter(lambda: archive_file.read(COPY_BUFFER_SIZE), b''):
+            sha.update(block)
+        file_size = archive_file.tell()
+        checksum = sha.hexdigest()
+        # Same layout as ir.attachment._file_write, so the file is shared and garbage collected alike
+        fname = f'{checksum[:2]}/{checksum}'
+        full_path = Attachment._full_path(fname)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            archive_file.seek(0)
+            with open(full_path, 'wb') as target:
+                shutil.copyfileobj(archive_file, target, COPY_BUFFER_SIZE)
+            Attachment._mark_for_gc(fname)
+        Attachment.create({
+            'name': 'report_file',
+            'res_model': self._name,
+            'res_field': 'report_file',
+            'res_id': self.id,
+            'type': 'binary',
+            'store_fname': fname,
+            'file_size': file_size,
+            'checksum': checksum,
+            'mimetype': 'application/zip',
+        })
+        self.invalidate_recordset(['report_file'])
+
+    @api.model
+    def _cron_render_batches(self):
+        """Render the pending batches one by one, committing after each."""
+        for batch in self.search([('state', '=', 'pending')], order='id'):
+            try:
+                with self.env.cr.savepoint():
+                    batch._render()
+            except Exception as e:
+                _logger.exception("Could not render report batch %s", batch.id)
+                batch.write({'state': 'failed', 'error': str(e)})
+            self.env.cr.commit()
@@ -1,4 +1,7 @@
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import create_index
+from .hotel_perf import profiled
 import logging
 _logger = logging.getLogger(__name__)
 
@@ -19,7 +22,7 @@ class HotelRoom(models.Model):
         ('reserved', 'Reserved'),
         ('under_maintenance', 'Under Maintenance'),
     ], default='available')
-    capacity = fields.Integer(string='Capacity', compute='_compute_capacity', store=True)
+    capacity = fields.Integer(string='Capacity', compute='_compute_capacity', store=True, index=True)
     product_id = fields.Many2one('product.product', string='Product', required=True)
     property_account_income_id = fields.Many2one('account.account', string="Income Account")
     reserv_ids = fields.One2many('hotel.reservation', 'room_id', string='Reservations'
@@ -38,5 +41,100 @@ class HotelRoom(models.Model):
     def create(self, vals):
         if vals.get('room_id', _('New')) == _('New'):
             vals['room_id'] = self.env['ir.sequence'].next_by_code('room.sequence') or _('New')
+        self.env['hotel.dashboard']._invalidate_cache()
         return super(HotelRoom, self).create(vals)
+
+    def write(self, vals):
+        # Archived stays still count in the analysis, loyalty and NPS statistics
+        reservations = self.env['hotel.reservation']
+        if {'price', 'single_bed', 'double_bed'}.intersection(vals):
+            reservations = self.with_context(active_test=False).reserv_ids
+        if 'price' in vals:
+            self.env['hotel.analysis.dirty'].mark_ranges(reservations._get_analysis_ranges())
+            reservations.guest_id._mark_loyalty_dirty()
+        # Bed changes move the rooms' scored stays to another room type
+        nps_keys = reservations._get_nps_keys() if {'single_bed', 'double_bed'}.intersection(vals) else None
+        self.env['hotel.dashboard']._invalidate_cache()
+        res = super(HotelRoom, self).write(vals)
+        if nps_keys is not None:
+            self.env['hotel.nps.stat']._refresh_stats(nps_keys | reservations._get_nps_keys())
+        return res
+
+    def unlink(self):
+        self.env['hotel.dashboard']._invalidate_cache()
+        return super(HotelRoom, self).unlink()
+
+    @api.model
+    @profiled
+    def search_available(self, date_from, date_to, capacity=0, exclude_reservation_ids=None):
+        """Return the rooms with at least ``capacity`` places and no booking overlapping [date_from, date_to).
+
+        Overlaps are resolved by the GiST index on the reservations' stay
+        daterange, so the cost does not depend on the booking history.
+        """
+        date_from, date_to = fields.Date.to_date(date_from), fields.Date.to_date(date_to)
+        if not date_from or not date_to or date_from > date_to:
+            raise UserError(_("The end date of the period must be on or after its start date."))
+        self.env['hotel.room'].flush_model(['capacity', 'state'])
+        self.env['hotel.reservation'].flush_model(['room_id', 'state', 'check_in_date', 'check_out_date'])
+        self.env.cr.execute("""
+            SELECT room.id
+              FROM hotel_room room
+             WHERE room.capacity >= %(capacity)s
+               AND room.state != 'under_maintenance'
+               AND NOT EXISTS (
+                   SELECT 1 FROM hotel_reservation r
+                    WHERE r.room_id = room.id
+                      AND r.state != 'cancel'
+                      AND daterange(r.check_in_date, r.check_out_date) && daterange(%(date_from)s::date, %(date_to)s::date)
+                      AND r.id != ALL(%(exclude)s)
+               )
+          ORDER BY room.capacity, room.id
+        """, {
+            'capacity': capacity or 0,
+            'date_from': date_from,
+            'date_to': date_to,
+            'exclude': list(exclude_reservation_ids or []),
+        })
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def is_free(self, date_from, date_to):
+        """Tell whether the room has no booked night between date_from (included) and date_to (excluded)."""
+        self.ensure_one()
+        return not self.env['hotel.room.night'].search_count([
+            ('room_id', '=', self.id),
+            ('date', '>=', date_from),
+            ('date', '<', date_to),
+        ], limit=1)
+
+    @profiled
+    def _refresh_state(self):
+        """Set the rooms reserved or available from tonight's entries in the room-night ledger."""
+        today = fields.Date.context_today(self)
+        rooms = self.filtered(lambda room: room.state != 'under_maintenance')
+        if not rooms:
+            return
+        occupied = self.env['hotel.room.night'].search([
+            ('room_id', 'in', rooms.ids),
+            ('date', '=', today),
+        ]).room_id
+        occupied.filtered(lambda room: room.state == 'available').write({'state': 'reserved'})
+        (rooms - occupied).filtered(lambda room: room.state == 'reserved').write({'state': 'available'})
+
+
+#----------------HOTEL ROOM NIGHT LEDGER CLASS-----------------------------------
+class HotelRoomNight(models.Model):
+    _name = 'hotel.room.night'
+    _description = 'Hotel Room Night'
+    _order = 'date, room_id'
+    _log_access = False
+
+    # One row per room and booked night, maintained by hotel.reservation
+    room_id = fields.Many2one('hotel.room', string='Room', required=True, ondelete='cascade')
+    date = fields.Date(string='Night', required=True)
+    reserv_id = fields.Many2one('hotel.reservation', string='Reservation', required=True, ondelete='cascade', index=True)
+
+    def init(self):
+        create_index(self._cr, 'hotel_room_night_room_date_index', self._table, ['room_id', 'date'])
+        create_index(self._cr, 'hotel_room_night_date_room_index', self._table, ['date', 'room_id'])
    
\ No newline at end of file
@@ -0,0 +1,103 @@
+import os
+import hashlib
+import pickle
+import threading
+import time
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Default location of the trained loyalty classifier
+MODEL_PATH = os.path.join(os.path.dirname(__file__), 'gb_model.pkl')
+
+# Loaded models per path, with the file signature they were loaded from
+_models = {}
+
+# Content hashes per path, with the file signature they were computed from
+_hashes = {}
+_lock = threading.Lock()
+
+
+class CustomUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module == 'sklearn.ensemble._gb_losses':
+            # Imported here so workers that never score guests don't load sklearn
+            from sklearn.ensemble import GradientBoostingClassifier
+            return GradientBoostingClassifier
+        return super().find_class(module, name)
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def model_signature(path=MODEL_PATH):
+    """Return the SHA-256 of the model artifact currently on disk.
+
+    Based on the content, so the same model deployed again or on another
+    server, with a different mtime, keeps the same signature. The hash is
+    only recomputed when the file's mtime or size changes.
+    """
+    signature = _signature(path)
+    cached = _hashes.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    sha = hashlib.sha256()
+    with open(path, 'rb') as model_file:
+        for block in iter(lambda: model_file.read(1024 * 1024), b''):
+            sha.update(block)
+    _hashes[path] = (signature, sha.hexdigest())
+    return _hashes[path][1]
+
+
+def get_model(path=MODEL_PATH):
+    """Return the unpickled model at ``path``, loading it at most once per process.
+
+    The cached model is reused as long as the file's mtime and size are
+    unchanged, so replacing the artifact on disk hot-reloads it on the next
+    call without restarting the workers.
+    """
+    signature = _signature(path)
+    cached = _models.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    with _lock:
+        cached = _models.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        start = time.perf_counter()
+        with open(path, 'rb') as model_file:
+            model = CustomUnpickler(model_file).load()
+        _logger.info("Loaded loyalty model from %s in %.3fs", path, time.perf_counter() - start)
+        _models[path] = (signature, model)
+        return model
+
+
+def fit_scaler(features):
+    """Return the standardisation parameters of a feature matrix as plain lists.
+
+    Equivalent to a fitted sklearn StandardScaler, but JSON serialisable so
+    it can be stored in the database, tagged with the model_signature of the
+    model it was fitted for, and reused between runs.
+    """
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    return {'mean': mean.tolist(), 'scale': scale.tolist()}
+
+
+def apply_scaler(scaler, features):
+    """Standardise a feature matrix with parameters returned by fit_scaler."""
+    import numpy as np
+
+    return (features - np.asarray(scaler['mean'])) / np.asarray(scaler['scale'])
+
+
+def predict(features, path=MODEL_PATH):
+    """Return the boolean loyalty predictions of an already scaled feature matrix.
+
+    Module-level so it can be submitted to a process pool: each worker
+    process loads the model once through get_model and reuses it.
+    """
+    return get_model(path).predict(features).astype(bool)
@@ -1,10 +1,27 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
-from datetime import date
+from odoo.tools import create_index
+from datetime import date, timedelta
+from .hotel_analysis import SOLD_STATES
+from .hotel_perf import profiled
+from psycopg2 import errors
+import time
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# Fields whose change invalidates the daily analysis of the reservation's stay
+ANALYSIS_FIELDS = {'state', 'check_in_date', 'check_out_date', 'room_id', 'guest_id', 'service_ids', 'service_line_ids'}
+
+# Fields whose change moves the reservation in the room-night ledger
+LEDGER_FIELDS = {'state', 'check_in_date', 'check_out_date', 'room_id'}
+
+# Default age in days past check-out after which closed reservations are archived
+ARCHIVE_HORIZON_DAYS = 730
+
+# Fields whose change moves the reservation's score in the NPS statistics
+NPS_FIELDS = {'nps_score', 'check_out_date', 'room_id'}
+
 class HotelReservation(models.Model):
     _name = 'hotel.reservation'
     _description = 'Hotel Reservation'
@@ -16,7 +33,7 @@ class HotelReservation(models.Model):
         'hotel.services', 'hotel_reservation_service_rel', 
         'reserv_id', 'service_id', string='Services'
     )
-    guest_id = fields.Many2one('hotel.guest', string='Guest Name', required=True)
+    guest_id = fields.Many2one('hotel.guest', string='Guest Name', required=True, index=True)
     first_name = fields.Char(string='First Name',related='guest_id.first_name')
     last_name = fields.Char(string='Last Name',related='guest_id.last_name')
     email = fields.Char(string='Email',related='guest_id.email')
@@ -31,21 +48,33 @@ class HotelReservation(models.Model):
     room_id = fields.Many2one('hotel.room', string='Room', required=True)
     guest_line_ids = fields.One2many('hotel.reservation.guest.line', 'reserv_id', string='Guest Lines')
     service_line_ids = fields.One2many('hotel.reservation.service.line', 'reserv_id', string='Service Lines')
-    services_total_price = fields.Monetary(string='Services Total Price', currency_field='currency_id', compute='_compute_services_total_price')
-    total_price = fields.Monetary(string='Total Price', currency_field='currency_id', compute='_compute_total_price')
+    services_total_price = fields.Monetary(string='Services Total Price', currency_field='currency_id', compute='_compute_services_total_price', store=True)
+    total_price = fields.Monetary(string='Total Price', currency_field='currency_id', compute='_compute_total_price', store=True)
     currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
     nights = fields.Integer(string='Nights', compute='_compute_nights', store=True, default=0)
-    num_adults = fields.Integer(string='Number of Adults', compute='_compute_num_adults')
-    num_kids = fields.Integer(string='Number of Kids', compute='_compute_num_kids')
+    num_adults = fields.Integer(string='Number of Adults', compute='_compute_head_counts')
+    num_kids = fields.Integer(string='Number of Kids', compute='_compute_head_counts')
     nps_score = fields.Integer(string='NPS Score', default=-1)
     feedback = fields.Text(string='Feedback') 
     invoice_id = fields.Many2one('account.move', string='Invoice', readonly=True)
+    invoice_queued = fields.Boolean(string='Invoice Queued', readonly=True, copy=False, index=True)
+    active = fields.Boolean(string='Active', default=True,
+                            help="Closed reservations past the archive horizon are archived, see _cron_archive_reservations.")
     state = fields.Selection([
         ('draft', 'Draft'),
         ('confirm', 'Confirmed'),
         ('done', 'Done'),
         ('cancel', 'Cancelled'),
     ], default='draft')
+
+    _sql_constraints = [
+        ('check_out_after_check_in', 'CHECK (check_out_date > check_in_date)',
+         'Check-out date must be higher than check-in date.'),
+        # Needs btree_gist, created in _auto_init
+        ('room_stay_overlap',
+         "EXCLUDE USING gist (room_id WITH =, daterange(check_in_date, check_out_date) WITH &&) WHERE (state != 'cancel')",
+         'This room is already reserved for these dates.'),
+    ]
     
     #----------------HOTEL RESRVATION COMPUTED FUNCTIONS-----------------------------------
     def button_confirm(self):self.write({'state': "confirm"})
@@ -65,63 +94,181 @@ class HotelReservation(models.Model):
         }
         return action
 
+    @profiled
     def create_invoice(self):
         if self.invoice_id:
             raise ValidationError(_("This reservation already has an invoice."))
-        invoice_lines = []
+        self._create_invoices()
+
+    def action_create_invoices(self):
+        """Invoice the selected done reservations that have no invoice yet, in one batch."""
+        reservations = self.filtered(lambda r: r.state == 'done' and not r.invoice_id)
+        reservations._create_invoices()
+        return True
+
+    def action_queue_invoices(self):
+        """Invoice the selected done reservations in the background."""
+        self.filtered(lambda r: r.state == 'done' and not r.invoice_id).write({'invoice_queued': True})
+        self.env.ref('hotel_manager.cron_generate_invoices')._trigger()
+        return True
+
+    def action_print_reports(self):
+        """Download the reports of the selected reservations as a zip of PDFs rendered in chunks."""
+        batch = self.env['hotel.report.batch']._create_batch(self)
+        batch._render()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/hotel.report.batch/{batch.id}/report_file/{batch.report_filename}?download=true',
+            'target': 'self',
+        }
+
+    def action_queue_reports(self):
+        """Render the reports of the selected reservations in the background, see Report Batches."""
+        self.env['hotel.report.batch']._create_batch(self)
+        self.env.ref('hotel_manager.cron_render_report_batches')._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'message': _("The reports are being rendered and will be available in Report Batches."),
+            },
+        }
+
+    @api.model
+    def _cron_archive_reservations(self, batch_size=1000):
+        """Archive the done and cancelled reservations that checked out before the archive horizon.
+
+        The horizon is the ``hotel_manager.archive_horizon_days`` system
+        parameter. Archived reservations stay in the analysis, NPS, loyalty,
+        exports and the guests' history, but leave the default searches and
+        lists, which then only touch the working set.
+        """
+        horizon = int(self.env['ir.config_parameter'].sudo().get_param('hotel_manager.archive_horizon_days', ARCHIVE_HORIZON_DAYS))
+        limit = fields.Date.context_today(self) - timedelta(days=horizon)
+        domain = [('state', 'in', ['done', 'cancel']), ('check_out_date', '<', limit), ('invoice_queued', '=', False)]
+        archived = 0
+        while True:
+            reservations = self.search(domain, limit=batch_size, order='id')
+            if not reservations:
+                break
+            reservations.write({'active': False})
+            self.env.cr.commit()
+            archived += len(reservations)
+            _logger.info("Archived %s reservations checked out before %s", archived, limit)
+        return archived
 
-        # Add room charges
-        if self.room_id:
-            room = self.room_id
+    @api.model
+    def _cron_generate_invoices(self, batch_size=200):
+        """Invoice the queued reservations batch by batch, committing and logging progress.
+
+        A batch that fails is retried reservation by reservation, so that the
+        reservations that cannot be invoiced are logged and unqueued instead
+        of blocking the queue.
+        """
+        domain = [('invoice_queued', '=', True), ('invoice_id', '=', False)]
+        total = self.search_count(domain)
+        done = failed = 0
+        start = time.perf_counter()
+        while True:
+            reservations = self.search(domain, limit=batch_size, order='id')
+            if not reservations:
+                break
+            failed += len(reservations._create_invoices_isolated())
+            reservations.write({'invoice_queued': False})
+            self.env.cr.commit()
+            done += len(reservations)
+            elapsed = time.perf_counter() - start
+            _logger.info("Invoiced %s/%s queued reservations, %s failed (%.1f invoices/s)",
+                         done - failed, total, failed, done / elapsed if elapsed else 0)
+
+    def _create_invoices_isolated(self):
+        """Invoice these reservations in one go, falling back to one by one on error. Returns the failed ones."""
+        try:
+            with self.env.cr.savepoint():
+                self._create_invoices()
+            return self.browse()
+        except Exception:
+            pass
+        failed = self.browse()
+        for reservation in self:
+            try:
+                with self.env.cr.savepoint():
+                    reservation._create_invoices()
+            except Exception:
+                _logger.exception("Could not invoice reservation %s", reservation.reserv_id)
+                failed |= reservation
+        return failed
+
+    @profiled
+    def _create_invoices(self):
+        """Create the invoices of these reservations with a single account.move create.
+
+        Rooms, services, products and income accounts of the whole batch
+        are prefetched once by the recordset reads below.
+        """
+        if not self:
+            return self.env['account.move']
+        start = time.perf_counter()
+        rooms = self.room_id
+        services = self.service_line_ids.service_id
+        for room in rooms:
             if not room.product_id:
                 raise ValidationError(_("The room %s does not have a linked product.") % room.room_id)
-            account_id = room.property_account_income_id.id
-            if not account_id:
+            if not room.property_account_income_id:
                 raise ValidationError(_("Please define an income account for the room: %s") % room.room_id)
-
-            invoice_lines.append((0, 0, {
-                'product_id': room.product_id.id,
-                'quantity': self.nights, 
-                'price_unit': room.price, 
-                'account_id': account_id,
-            }))
-
-        # Add service charges
-        for line in self.service_line_ids:
-            service = line.service_id
+        for service in services:
             if not service.product_id:
                 raise ValidationError(_("The service %s does not have a linked product.") % service.service_id)
-
-            account_id = service.property_account_income_id.id
-            if not account_id:
+            if not service.property_account_income_id:
                 raise ValidationError(_("Please define an income account for the service: %s") % service.service_id)
 
-            invoice_lines.append((0, 0, {
-                'quantity': line.quantity,
-                'price_unit': line.price_unit,
-                'account_id': account_id,
-            }))
-
-        # Create the invoice
-        invoice = self.env['account.move'].create({
-            'move_type': 'out_invoice',
-            'invoice_date': fields.Date.today(),
-            'invoice_line_ids': invoice_lines,
-        })
-
-        self.invoice_id = invoice.id
-
-    @api.depends('guest_line_ids.guest_id')
-    def _compute_num_adults(self):
+        today = fields.Date.today()
+        moves_vals = []
         for reservation in self:
-            num_adults = len([guest.guest_id.age for guest in reservation.guest_line_ids if guest.guest_id.age >= 18])
-            reservation.num_adults = num_adults
+            invoice_lines = []
+
+            # Add room charges
+            room = reservation.room_id
+            if room:
+                invoice_lines.append((0, 0, {
+                    'product_id': room.product_id.id,
+                    'quantity': reservation.nights,
+                    'price_unit': room.price,
+                    'account_id': room.property_account_income_id.id,
+                }))
+
+            # Add service charges
+            for line in reservation.service_line_ids:
+                invoice_lines.append((0, 0, {
+                    'quantity': line.quantity,
+                    'price_unit': line.price_unit,
+                    'account_id': line.service_id.property_account_income_id.id,
+                }))
+
+            moves_vals.append({
+                'move_type': 'out_invoice',
+                'invoice_date': today,
+                'invoice_line_ids': invoice_lines,
+            })
 
-    @api.depends('guest_line_ids.guest_id')
-    def _compute_num_kids(self):
+        # Create the invoices
+        invoices = self.env['account.move'].create(moves_vals)
+        for reservation, invoice in zip(self, invoices):
+            reservation.invoice_id = invoice
+        elapsed = time.perf_counter() - start
+        _logger.info("Created %s invoices in %.2fs (%.1f invoices/s)", len(invoices), elapsed, len(invoices) / elapsed if elapsed else 0)
+        return invoices
+
+    @api.depends('guest_line_ids.guest_id.age')
+    @profiled
+    def _compute_head_counts(self):
+        # Load the ages of every guest of the recordset at once, then count in one pass
+        self.guest_line_ids.guest_id.mapped('age')
         for reservation in self:
-            num_kids = len([guest.guest_id.age for guest in reservation.guest_line_ids if guest.guest_id.age < 18])
-            reservation.num_kids = num_kids
+            ages = [line.guest_id.age for line in reservation.guest_line_ids]
+            reservation.num_adults = sum(1 for age in ages if age >= 18)
+            reservation.num_kids = len(ages) - reservation.num_adults
 
     @api.depends('check_in_date', 'check_out_date')
     def _compute_nights(self):
@@ -140,7 +287,8 @@ class HotelReservation(models.Model):
         if self.guest_id.age and self.guest_id.age < 18 :
             raise ValidationError(_("You must be older then 18 in order to reserve."))
 
-    @api.depends('services_total_price', 'room_id', 'check_in_date', 'check_out_date', 'nights')
+    @api.depends('services_total_price', 'room_id', 'room_id.price', 'check_in_date', 'check_out_date', 'nights')
+    @profiled
     def _compute_total_price(self):
         for reservation in self:
             if reservation.check_in_date and reservation.check_out_date and reservation.room_id.price and reservation.services_total_price and reservation.nights:
@@ -151,6 +299,7 @@ class HotelReservation(models.Model):
                 reservation.total_price = 0
 
     @api.depends('service_line_ids.total_price')
+    @profiled
     def _compute_services_total_price(self):
         for reservation in self:
             if reservation.service_line_ids:
@@ -165,58 +314,223 @@ class HotelReservation(models.Model):
         if self.check_in_date and self.check_in_date < fields.Date.today():
             raise ValidationError(_("Check-in date must be today or later."))
 
-    @api.onchange('room_id')
+    @api.onchange('room_id', 'check_in_date', 'check_out_date')
     def _check_room_availability(self):
         if self.room_id and self.room_id.state == 'under_maintenance':
             raise ValidationError(_("Selected room is unavailable due to maintenance."))
-        if self.room_id and self.room_id.state == 'reserved':
-            raise ValidationError(_("Selected room is already reserved."))
-        else:
-            self.room_id.state = 'reserved'
+        if self.room_id and self.check_in_date and self.check_out_date and self.check_out_date > self.check_in_date:
+            available = self.env['hotel.room'].search_available(
+                self.check_in_date, self.check_out_date,
+                exclude_reservation_ids=self._origin.ids,
+            )
+            if self.room_id._origin not in available:
+                raise ValidationError(_("Selected room is already reserved."))
 
     @api.model
+    @profiled
     def make_rooms_available(self):
-        reservations = self.search([])
-        for reservation in reservations:
-            if (reservation.check_out_date < fields.Date.today() or not reservation.exists()) and reservation.room_id.state == 'reserved':
-                reservation.room_id.state = 'available'
-            elif reservation.check_out_date >= fields.Date.today() and reservation.room_id.state == 'available':
-                reservation.room_id.state = 'reserved'
-            elif reservation.room_id.state == 'under_maintenance':
-                reservation.room_id.state = 'under_maintenance'
-    
+        """Daily refresh of the room states from tonight's room-night ledger entries. Returns the number of rooms checked."""
+        rooms = self.env['hotel.room'].search([('state', '!=', 'under_maintenance')])
+        rooms._refresh_state()
+        return len(rooms)
+
+    def _auto_init(self):
+        try:
+            with self._cr.savepoint():
+                self._cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        except Exception:
+            _logger.warning("btree_gist is not available, overlapping room stays will not be prevented by the database")
+        return super(HotelReservation, self)._auto_init()
+
+    def init(self):
+        # The overlap constraint's index answers "which rooms overlap these dates" for availability searches
+        self._cr.execute("SELECT 1 FROM pg_constraint WHERE conname = 'hotel_reservation_room_stay_overlap'")
+        if self._cr.fetchone():
+            self._cr.execute("DROP INDEX IF EXISTS hotel_reservation_stay_gist_index")
+        else:
+            self._cr.execute("""
+                CREATE INDEX IF NOT EXISTS hotel_reservation_stay_gist_index
+                    ON hotel_reservation USING gist (daterange(check_in_date, check_out_date))
+                 WHERE state != 'cancel'
+            """)
+        # Day-to-day searches only read active reservations, whatever the size of the history
+        create_index(self._cr, 'hotel_reservation_active_dates_index', self._table,
+                     ['check_in_date', 'check_out_date'], where='active')
+        # Guest lookups read archived stays too (history, loyalty features, repeat stays), so guest_id has
+        # a full index instead
+        self._cr.execute("DROP INDEX IF EXISTS hotel_reservation_active_guest_index")
+        # Backfill the room-night ledger the first time the module is upgraded on existing data
+        self._cr.execute("SELECT 1 FROM hotel_room_night LIMIT 1")
+        if not self._cr.fetchone():
+            self._cr.execute("SELECT id FROM hotel_reservation")
+            self.browse([row[0] for row in self._cr.fetchall()])._sync_room_nights()
+
     @api.model
+    @profiled
+    def book_room(self, vals_list):
+        """Create confirmed reservations, safe against concurrent bookings of the same room.
+
+        The booked rooms are locked in id order, so concurrent bookings of a
+        room queue up while other rooms are booked in parallel, and the
+        room_stay_overlap exclusion constraint refuses any overlapping stay at
+        insert time, across workers. An overlap raises a ValidationError and
+        leaves the transaction usable.
+        """
+        if isinstance(vals_list, dict):
+            vals_list = [vals_list]
+        room_ids = sorted({vals['room_id'] for vals in vals_list})
+        self.env['hotel.room'].flush_model()
+        self.env.cr.execute("SELECT id FROM hotel_room WHERE id IN %s ORDER BY id FOR UPDATE", [tuple(room_ids)])
+        try:
+            with self.env.cr.savepoint():
+                reservations = self.create([dict(vals, state=vals.get('state', 'confirm')) for vals in vals_list])
+                self.env.flush_all()
+        except errors.ExclusionViolation:
+            raise ValidationError(_("Selected room is already reserved."))
+        return reservations
+
     def write(self, vals):
+        tracked = ANALYSIS_FIELDS.intersection(vals)
+        old_services = {reservation.id: reservation.service_ids for reservation in self} if 'service_ids' in vals else None
+        if tracked:
+            ranges = self._get_analysis_ranges(extend_guests='state' in tracked or 'guest_id' in tracked)
+        rooms = self.room_id
+        guests = self.guest_id
+        nps_keys = self._get_nps_keys() if NPS_FIELDS.intersection(vals) else None
         res = super(HotelReservation, self).write(vals)
-        for record in self:
-            record._create_services_lines()
+        if nps_keys is not None:
+            self.env['hotel.nps.stat']._refresh_stats(nps_keys | self._get_nps_keys())
+        if LEDGER_FIELDS.intersection(vals):
+            self._sync_room_nights()
+            (rooms | self.room_id)._refresh_state()
+        if tracked:
+            ranges += self._get_analysis_ranges(extend_guests='state' in tracked or 'guest_id' in tracked)
+            self.env['hotel.analysis.dirty'].mark_ranges(ranges)
+            (guests | self.guest_id)._mark_loyalty_dirty()
+        if old_services is not None:
+            self._sync_service_lines(old_services)
+        self.env['hotel.dashboard']._invalidate_cache()
         return res
 
-    @api.model
-    def create(self, vals):
-        if vals.get('reserv_id', _('New')) == _('New'):
-            vals['reserv_id'] = self.env['ir.sequence'].next_by_code('reservation.sequence') or _('New')
-        reservation = super(HotelReservation, self).create(vals)
-        reservation._create_guest_line()
-        reservation._create_services_lines()
-        return reservation
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('reserv_id', _('New')) == _('New'):
+                vals['reserv_id'] = self.env['ir.sequence'].next_by_code('reservation.sequence') or _('New')
+        reservations = super(HotelReservation, self).create(vals_list)
+        reservations._sync_room_nights()
+        reservations.room_id._refresh_state()
+        reservations._create_guest_lines()
+        reservations._sync_service_lines()
+        self.env['hotel.analysis.dirty'].mark_ranges(reservations._get_analysis_ranges(extend_guests=True))
+        reservations.guest_id._mark_loyalty_dirty()
+        self.env['hotel.nps.stat']._refresh_stats(reservations._get_nps_keys())
+        self.env['hotel.dashboard']._invalidate_cache()
+        return reservations
+
+    def unlink(self):
+        self.env['hotel.analysis.dirty'].mark_ranges(self._get_analysis_ranges(extend_guests=True))
+        self.guest_id._mark_loyalty_dirty()
+        rooms = self.room_id
+        nps_keys = self._get_nps_keys()
+        res = super(HotelReservation, self).unlink()
+        rooms._refresh_state()
+        self.env['hotel.nps.stat']._refresh_stats(nps_keys)
+        self.env['hotel.dashboard']._invalidate_cache()
+        return res
+
+    @profiled
+    def _sync_room_nights(self):
+        """Rebuild the room-night ledger rows of these reservations in two set-based statements.
+
+        Every night between check-in (included) and check-out (excluded) of a
+        reservation that is not cancelled holds its room.
+        """
+        if not self.ids:
+            return
+        self.flush_recordset(['state', 'check_in_date', 'check_out_date', 'room_id'])
+        self.env.cr.execute("DELETE FROM hotel_room_night WHERE reserv_id IN %s", [tuple(self.ids)])
+        self.env.cr.execute("""
+            INSERT INTO hotel_room_night (room_id, date, reserv_id)
+            SELECT r.room_id, night::date, r.id
+              FROM hotel_reservation r
+        CROSS JOIN LATERAL generate_series(r.check_in_date, r.check_out_date - 1, interval '1 day') AS gs(night)
+             WHERE r.id IN %s
+               AND r.state != 'cancel'
+               AND r.room_id IS NOT NULL
+        """, [tuple(self.ids)])
+        self.env['hotel.room.night'].invalidate_model()
+
+    def _get_nps_keys(self):
+        """Return the (check-out date, room capacity) keys of the NPS statistics these reservations' scores count in."""
+        return {
+            (reservation.check_out_date, reservation.room_id.capacity)
+            for reservation in self
+            if 0 <= reservation.nps_score <= 10 and reservation.check_out_date and reservation.room_id
+        }
+
+    def _get_analysis_ranges(self, extend_guests=False):
+        """Return the (date_from, date_to) windows of the analysis affected by these reservations.
+
+        Only sold reservations contribute to the KPIs, so drafts and cancelled
+        reservations yield no window. With ``extend_guests`` the window also
+        covers the guest's later stays, whose repeat-guest flag may change.
+        """
+        sold = self.filtered(lambda r: r.state in SOLD_STATES and r.check_in_date and r.check_out_date)
+        if not sold:
+            return []
+        last_check_out = {}
+        if extend_guests:
+            groups = self.sudo()._read_group(
+                [('guest_id', 'in', sold.guest_id.ids), ('state', 'in', SOLD_STATES)],
+                ['guest_id'], ['check_out_date:max'],
+            )
+            last_check_out = {guest.id: check_out for guest, check_out in groups}
+        return [
+            (reservation.check_in_date,
+             max(reservation.check_out_date, last_check_out.get(reservation.guest_id.id) or reservation.check_out_date))
+            for reservation in sold
+        ]
+
+    def _mark_services_changed(self):
+        """Queue the analysis days and loyalty rescoring that depend on these reservations' service revenue."""
+        self.env['hotel.analysis.dirty'].mark_ranges(self._get_analysis_ranges())
+        self.guest_id._mark_loyalty_dirty()
+        self.env['hotel.dashboard']._invalidate_cache()
 
     
-    def _create_guest_line(self):
-        self.env['hotel.reservation.guest.line'].create({
-            'reserv_id': self.id,  
-            'guest_id': self.guest_id.id, 
-        })
-
-    def _create_services_lines(self):
-        for service in self.service_ids:
-            if not self.service_line_ids.filtered(lambda line: line.service_id == service):
-                self.env['hotel.reservation.service.line'].create({
-                    'reserv_id': self.id,   
-                    'service_id': service.id, 
-                    'quantity' : 1,
-                    'price_unit' : service.price, 
-                })
+    def _create_guest_lines(self):
+        """Add the main guest of each reservation to its guest lines, in one batched create."""
+        self.env['hotel.reservation.guest.line'].create([{
+            'reserv_id': reservation.id,
+            'guest_id': reservation.guest_id.id,
+        } for reservation in self])
+
+    def _sync_service_lines(self, old_services=None):
+        """Align the service lines of these reservations with their services.
+
+        Desired and existing lines are compared as (reservation, service)
+        pairs over the whole recordset: missing lines are created in one
+        batch and, given the services each reservation had before a write,
+        the lines of removed services are unlinked in one call. Lines added by
+        hand for services that were never selected are kept.
+        """
+        existing = {(line.reserv_id.id, line.service_id.id) for line in self.service_line_ids}
+        self.env['hotel.reservation.service.line'].create([
+            {'reserv_id': reservation.id, 'service_id': service.id, 'quantity': 1}
+            for reservation in self
+            for service in reservation.service_ids
+            if (reservation.id, service.id) not in existing
+        ])
+        if old_services:
+            removed = {
+                (reservation.id, service.id)
+                for reservation in self
+                for service in old_services.get(reservation.id, reservation.service_ids) - reservation.service_ids
+            }
+            self.service_line_ids.filtered(
+                lambda line: (line.reserv_id.id, line.service_id.id) in removed
+            ).unlink()
 
 
 #----------------HOTEL RESRVATION NPS CLASS-----------------------------------
@@ -249,7 +563,7 @@ class HotelReservationServiceLine(models.Model):
     _name = 'hotel.reservation.service.line'
     _description = 'Reservation Service Line'
 
-    reserv_id = fields.Many2one('hotel.reservation', string='Reservation', ondelete='cascade')
+    reserv_id = fields.Many2one('hotel.reservation', string='Reservation', ondelete='cascade', index=True)
     service_id = fields.Many2one('hotel.services', string='Service', required=True)
     quantity = fields.Integer(string='Quantity', default=1)
     price_unit = fields.Monetary(string='Unit Price', related='service_id.price')
@@ -261,13 +575,31 @@ class HotelReservationServiceLine(models.Model):
         for line in self:
             line.total_price = line.quantity * line.price_unit
 
+    # Lines edited directly, outside of their reservation's write, still change its revenue
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(HotelReservationServiceLine, self).create(vals_list)
+        lines.reserv_id._mark_services_changed()
+        return lines
+
+    def write(self, vals):
+        reservations = self.reserv_id
+        res = super(HotelReservationServiceLine, self).write(vals)
+        if {'quantity', 'service_id', 'reserv_id'}.intersection(vals):
+            (reservations | self.reserv_id)._mark_services_changed()
+        return res
+
+    def unlink(self):
+        self.reserv_id._mark_services_changed()
+        return super(HotelReservationServiceLine, self).unlink()
+
 
 #----------------HOTEL RESRVATION GUESTS LINES CLASS-----------------------------------
 class HotelReservationGuestLine(models.Model):
     _name = 'hotel.reservation.guest.line'
     _description = 'Reservation Guests Line'
 
-    reserv_id = fields.Many2one('hotel.reservation', string='Reservation', ondelete='cascade')
+    reserv_id = fields.Many2one('hotel.reservation', string='Reservation', ondelete='cascade', index=True)
     guest_id = fields.Many2one('hotel.guest', string='Guest Name', required=True)    
     first_name = fields.Char(string='First Name',related='guest_id.first_name', required=True)
     last_name = fields.Char(string='Last Name',related='guest_id.last_name', required=True)
@@ -0,0 +1 @@
+from . import reservation_report
\ No newline at end of file
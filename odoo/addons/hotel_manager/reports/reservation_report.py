@@ -0,0 +1,38 @@
+from odoo import models, api
+
+
+class ReservationReport(models.AbstractModel):
+    _name = 'report.hotel_manager.reservation_report'
+    _description = 'Reservation Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['hotel.reservation'].browse(docids)
+        self._prefetch(docs)
+        return {
+            'doc_ids': docids,
+            'doc_model': 'hotel.reservation',
+            'docs': docs,
+        }
+
+    @api.model
+    def _prefetch(self, reservations):
+        """Load every record displayed by the template with one query per model.
+
+        Without it the template fetches the guests, rooms, lines, services and
+        countries as it walks each reservation.
+        """
+        reservations.fetch(['reserv_id', 'check_in_date', 'check_out_date', 'guest_id', 'room_id', 'nights',
+                            'total_price', 'currency_id', 'guest_line_ids', 'service_line_ids'])
+        reservations.room_id.fetch(['room_id', 'price', 'currency_id'])
+        guest_lines = reservations.guest_line_ids
+        guest_lines.fetch(['guest_id'])
+        guests = reservations.guest_id | guest_lines.guest_id
+        guests.fetch(['first_name', 'last_name', 'number', 'email', 'age', 'nin', 'country_state', 'country'])
+        guests.country_state.fetch(['name'])
+        guests.country.fetch(['name'])
+        service_lines = reservations.service_line_ids
+        service_lines.fetch(['service_id', 'quantity', 'total_price', 'currency_id'])
+        service_lines.service_id.fetch(['service_id', 'price', 'currency_id'])
+        (reservations.currency_id | reservations.room_id.currency_id | service_lines.currency_id).fetch(
+            ['name', 'symbol', 'position', 'decimal_places', 'rounding'])
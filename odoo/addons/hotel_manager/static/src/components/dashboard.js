@@ -8,14 +8,12 @@ import { Kpi } from "./kpi/kpi.js";
 import { NPSKpi } from "./kpi/nps_kpi.js";
 import { AnalysisKpi } from "./kpi/analysis_kpi.js";
 
-const { DateTime, Settings } = luxon ;
 const { Component, onWillStart, useState, onMounted } = owl;
 
 class HotelDashboard extends Component {
     setup() {
         this.state = useState({
             reservations: {
-                totalReservations: [],
                 numReservations: 0,
                 checkIns: 0, 
                 checkOuts: 0,
@@ -45,20 +43,28 @@ class HotelDashboard extends Component {
         this.actionService = useService("action");
 
         onWillStart(async () => {            
-            const today = DateTime.now();
-            const lastMonth = today.minus({ months: 1 });
-            await this.fetchCompanyData();
-            await this.fetchReservationData();
-            await this.fetchRoomsData();
-            await this.fetchServicesData();
-            await this.fetchAnalytics();
+            await this.fetchDashboardData();
         });
         onMounted(async () => {
             
         });
     }
 
-    async fetchAnalytics() {
+    async fetchDashboardData() {
+        try {
+            // All the aggregates are computed server side in a single call
+            const data = await this.orm.call('hotel.dashboard', 'get_dashboard_data', []);
+            this.state.company.name = data.company.name;
+            this.setReservationData(data.reservations, data.nps);
+            this.setRoomsData(data.rooms);
+            this.setServicesData(data.services);
+            this.setAnalytics(data.analysis);
+        } catch (error) {
+            console.error('Error fetching dashboard data:', error);
+        }
+    }
+
+    setAnalytics(analysis) {
         function formatnumber(number) {
             if (number >= 1000000) {
                 return (number / 1000000).toFixed(1) + 'M'; 
@@ -68,140 +74,47 @@ class HotelDashboard extends Component {
                 return Math.floor(number); 
             }
         }
-        try {
-            const analysis = await this.orm.call('hotel.analysis', 'search_read', [[]]);
-            const last_update = analysis.length-1;
-            console.log(analysis);
-            if (analysis) {
-                this.state.anaytics.revpar = formatnumber(analysis[last_update].revpar);
-                this.state.anaytics.adr = formatnumber(analysis[last_update].adr);
-                this.state.anaytics.occupancy_rate = (analysis[last_update].occupancy_rate * 100).toFixed(1) + '%';
-                this.state.anaytics.loyal_guests = analysis[last_update].loyal_guests;
-            }
-        } catch (error) {
-            console.error('Error fetching analysis data:', error);
+        if (analysis && analysis.id) {
+            this.state.anaytics.revpar = formatnumber(analysis.revpar);
+            this.state.anaytics.adr = formatnumber(analysis.adr);
+            this.state.anaytics.occupancy_rate = analysis.occupancy_rate.toFixed(1) + '%';
+            this.state.anaytics.loyal_guests = analysis.loyal_guests;
         }
     }
 
-    async fetchCompanyData() {
-        try {
-            const company = await this.orm.call('res.company', 'read', 
-                [this.env.companyId], // Get the ID of the current company
-                ['name']  // Only fetch the 'name' field
-            );
-            if (company) { // No need to check length, as we expect a single company record
-                this.state.company.name = company.name;
-            }
-        } catch (error) {
-            console.error('Error fetching company data:', error);
+    setReservationData(reservations, nps) {
+        this.state.reservations.numReservations = reservations.count;
+        this.state.reservations.checkIns = reservations.check_ins;
+        this.state.reservations.checkOuts = reservations.check_outs;
+        this.state.reservations.stays = reservations.stays;
+
+        const totalfeedback = nps.responses;
+        if (totalfeedback) {
+            this.state.nps.score = Math.round(((nps.promoters - nps.detractors) / totalfeedback) * 100);
+            this.state.nps.promotersPercentage = Math.round((nps.promoters / totalfeedback) * 100);
+            this.state.nps.neutralsPercentage = Math.round((nps.neutrals / totalfeedback) * 100);
+            this.state.nps.detractorsPercentage = Math.round((nps.detractors / totalfeedback) * 100);
         }
     }
 
-    async fetchReservationData() {
-        try {
-            const totalReservations = await this.orm.call('hotel.reservation', 'search_read', [[]]);
-            if (totalReservations) {
-                this.state.reservations.totalReservations = totalReservations;
-                const today = DateTime.now();
-                const lastMonth = today.minus({ months: 1 });
-                this.state.reservations.numReservations = totalReservations.length;
-                const nps = totalReservations.reduce((accumulator, reservation) => {
-                    const rating = reservation.nps_score;
-                    if (rating == -1) {                       
-                    } else if (rating >= 9) {
-                        accumulator.promoters++;
-                    } else if (rating >= 7) {
-                        accumulator.neutrals++;
-                    } else {
-                        accumulator.detractors++;
-                    }
-                    return accumulator;
-                }, { promoters: 0, neutrals: 0, detractors: 0 });
-                const  totalfeedback = nps.promoters + nps.detractors + nps.neutrals;
-                this.state.nps.score = Math.round(((nps.promoters - nps.detractors) / totalfeedback) * 100);
-                this.state.nps.promotersPercentage = Math.round((nps.promoters / totalfeedback) * 100);
-                this.state.nps.neutralsPercentage = Math.round((nps.neutrals / totalfeedback) * 100);
-                this.state.nps.detractorsPercentage = Math.round((nps.detractors / totalfeedback) * 100);
-                
-                this.state.reservations.checkIns = totalReservations.filter((reservation) => {
-                    return (
-                        DateTime.fromISO(reservation.check_in_date, { zone: this.userTimeZone }).hasSame(today, 'day')
-                    );
-                }).length;
-
-                this.state.reservations.checkOuts = totalReservations.filter((reservation) => {
-                    return (
-                        DateTime.fromISO(reservation.check_out_date, { zone: this.userTimeZone }).hasSame(today, 'day')
-                    );
-                }).length;
-
-                this.state.reservations.stays = totalReservations.filter((reservation) => {
-                    const checkInDate = DateTime.fromISO(reservation.check_in_date, { zone: this.userTimeZone });
-                    const checkOutDate = DateTime.fromISO(reservation.check_out_date, { zone: this.userTimeZone });
-                    return (checkOutDate >= today && checkInDate <= today);
-                }).length;
-            }
-        } catch (error) {
-            console.error('Error fetching reservation data:', error);
-        }
-    }
-
-    async fetchServicesData() {
-        function countServiceOccurrences(serviceIds, services) {
-            const occurrenceCounts = {};
-
-            for (const service of services) {
-              const serviceId = service.id;
-              occurrenceCounts[serviceId] = 0; 
-
-              for (const reservation of serviceIds) {
-                if (reservation.service_ids.includes(serviceId)) {
-                  occurrenceCounts[serviceId]++;
-                }
-              }
-            }
-            return occurrenceCounts;
-          }
-
-        try {
-            const reservations = await this.orm.searchRead('hotel.reservation', [], ['service_ids']);
-            const services = await this.orm.searchRead('hotel.services', [], ['service_id']);
-            const servicesCount = countServiceOccurrences(reservations, services);
-
-            this.state.reservations.servicesCount = Object.entries(servicesCount).map(([id, occurance]) => ({ id , occurance }));
-            this.state.servicesChartData = {
-                labels: services.map(x => x.service_id),
-                datasets: [{
-                    label: 'Services',
-                    data: this.state.reservations.servicesCount.map(x => x.occurance),
-                }],
-            };
-        }
-        catch (error) {
-            console.error('Error fetching services:', error);
-        }
+    setServicesData(services) {
+        this.state.servicesChartData = {
+            labels: services.map(x => x.name),
+            datasets: [{
+                label: 'Services',
+                data: services.map(x => x.count),
+            }],
+        };
     }
     
-    async fetchRoomsData() {
-        try {
-            const totalRooms = await this.orm.call('hotel.room', 'search_read', [[]]);
-            if (totalRooms) {
-                const availableRooms = totalRooms.filter((room) => room.state === 'available').length;
-                const occupiedRooms = totalRooms.filter((room) => room.state === 'reserved').length;
-                const underMaintenanceRooms = totalRooms.filter((room) => room.state === 'under_maintenance').length;
-
-                this.state.roomChartData = {               
-                    labels: ['Reserved', 'Free', 'Under Maintenance'],
-                    datasets: [{
-                        label: 'Rooms',
-                        data: [availableRooms, occupiedRooms, underMaintenanceRooms],
-                    }]
-                };
-
-            }
-        } catch (error) {
-            console.error('Error fetching rooms data:', error);
-        }
+    setRoomsData(rooms) {
+        this.state.roomChartData = {               
+            labels: ['Reserved', 'Free', 'Under Maintenance'],
+            datasets: [{
+                label: 'Rooms',
+                data: [rooms.reserved, rooms.available, rooms.under_maintenance],
+            }]
+        };
     }
     onClickNewReservation() {
         try {
@@ -212,7 +125,7 @@ class HotelDashboard extends Component {
     }
 
     viewAnalytics() {
-        this.actionService.doAction("hotel_manager.action_hotel_analysis_dashboard");
+        this.actionService.doAction("hotel_manager.action_hotel_analysis_auto");
     }
     viewReservations() {
         this.actionService.doAction("hotel_manager.action_reservations");
@@ -0,0 +1,8 @@
+from . import test_reservation
+from . import test_room_night
+from . import test_service_line
+from . import test_booking
+from . import test_analysis
+from . import test_rollup
+from . import test_loyalty
+from . import test_benchmark
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Book random stays on a few rooms from concurrent workers through book_room.
+
+Each worker has its own database connection and commits every booking,
+like separate Odoo workers or channels would. Few rooms and a short
+horizon make most bookings collide. Reports the bookings per second, the
+refused overlaps and the double bookings left in the database, which must
+be zero.
+
+The bookings are committed, so run it against a scratch database with
+hotel_manager installed, never a production one::
+
+    python3 booking_load_test.py -c /etc/odoo/odoo.conf -d scratch_db --workers 8
+
+The rooms, guests and reservations of the test are removed afterwards
+unless ``--keep`` is given. Results are printed as JSON.
+"""
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import random
+import json
+import time
+import logging
+
+import odoo
+from odoo import api, fields, SUPERUSER_ID
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+
+def run_booking_load_test(registry, workers=8, bookings_per_worker=200, rooms=10, horizon=180, seed=42, cleanup=True):
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        product = env['product.product'].create({'name': 'Load Test Stay', 'type': 'service'})
+        room_ids = env['hotel.room'].create([
+            {'double_bed': 1, 'price': 100, 'product_id': product.id} for _ in range(rooms)
+        ]).ids
+        guest_ids = env['hotel.guest'].create([{
+            'first_name': 'Load', 'last_name': f'Test {index}',
+            'email': f'load{index}@example.com', 'age': 30,
+        } for index in range(workers)]).ids
+        product_id = product.id
+        start_day = fields.Date.context_today(env.user) + timedelta(days=1)
+
+    def book(worker):
+        rng = random.Random(seed + worker)
+        booked = refused = failed = 0
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            for _ in range(bookings_per_worker):
+                check_in = start_day + timedelta(days=rng.randrange(horizon))
+                try:
+                    env['hotel.reservation'].book_room({
+                        'room_id': rng.choice(room_ids),
+                        'guest_id': guest_ids[worker],
+                        'check_in_date': check_in,
+                        'check_out_date': check_in + timedelta(days=rng.randint(1, 4)),
+                    })
+                    cr.commit()
+                    booked += 1
+                except ValidationError:
+                    cr.rollback()
+                    refused += 1
+                except Exception:
+                    _logger.exception("Booking failed")
+                    cr.rollback()
+                    failed += 1
+        return booked, refused, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        counts = list(executor.map(book, range(workers)))
+    seconds = time.perf_counter() - start
+
+    with registry.cursor() as cr:
+        cr.execute("""
+            SELECT COUNT(*)
+              FROM hotel_reservation a
+              JOIN hotel_reservation b
+                ON b.room_id = a.room_id AND b.id > a.id
+               AND daterange(b.check_in_date, b.check_out_date) && daterange(a.check_in_date, a.check_out_date)
+             WHERE a.room_id IN %s AND a.state != 'cancel' AND b.state != 'cancel'
+        """, [tuple(room_ids)])
+        double_bookings = cr.fetchone()[0]
+        if cleanup:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['hotel.reservation'].with_context(active_test=False).search([('room_id', 'in', room_ids)]).unlink()
+            env['hotel.room'].browse(room_ids).unlink()
+            env['hotel.guest'].browse(guest_ids).unlink()
+            env['product.product'].browse(product_id).unlink()
+
+    booked = sum(count[0] for count in counts)
+    return {
+        'date': fields.Datetime.to_string(fields.Datetime.now()),
+        'params': {
+            'workers': workers, 'bookings_per_worker': bookings_per_worker,
+            'rooms': rooms, 'horizon': horizon, 'seed': seed,
+        },
+        'seconds': round(seconds, 4),
+        'booked': booked,
+        'refused': sum(count[1] for count in counts),
+        'failed': sum(count[2] for count in counts),
+        'bookings_per_sec': round(booked / seconds, 1) if seconds else None,
+        'attempts_per_sec': round(workers * bookings_per_worker / seconds, 1) if seconds else None,
+        'double_bookings': double_bookings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking load test, for scratch databases only.")
+    parser.add_argument('-c', '--config', help="Odoo configuration file")
+    parser.add_argument('-d', '--database', required=True, help="Scratch database with hotel_manager installed")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--bookings-per-worker', type=int, default=200)
+    parser.add_argument('--rooms', type=int, default=10)
+    parser.add_argument('--horizon', type=int, default=180, help="Days over which the stays are spread")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help="Keep the test rooms, guests and reservations")
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(['-c', args.config] if args.config else [])
+    results = run_booking_load_test(
+        odoo.registry(args.database), workers=args.workers, bookings_per_worker=args.bookings_per_worker,
+        rooms=args.rooms, horizon=args.horizon, seed=args.seed, cleanup=not args.keep,
+    )
+    print(json.dumps(results, indent=2))
+    if results['double_bookings']:
+        raise SystemExit(f"{results['double_bookings']} double bookings left in the database")
+
+
+if __name__ == '__main__':
+    main()
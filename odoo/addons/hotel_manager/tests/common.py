@@ -0,0 +1,41 @@
+from odoo.tests.common import TransactionCase
+from datetime import date, timedelta
+
+
+class HotelCommon(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        product = cls.env['product.product'].create({'name': 'Hotel Test Product'})
+        cls.rooms = cls.env['hotel.room']
+        for price in (100.0, 200.0, 300.0):
+            cls.rooms |= cls.env['hotel.room'].create({'single_bed': 1, 'double_bed': 1, 'price': price, 'product_id': product.id})
+        cls.breakfast, cls.spa = cls.env['hotel.services'].create([
+            {'service_id': 'Test Breakfast', 'price': 15.0, 'product_id': product.id},
+            {'service_id': 'Test Spa', 'price': 40.0, 'product_id': product.id},
+        ])
+        cls.guests = cls.env['hotel.guest'].create([{
+            'first_name': f'Guest{index}',
+            'last_name': 'Test',
+            'age': 30,
+            'email': f'guest{index}@example.com',
+        } for index in range(3)])
+        # Far enough in the future to meet no other reservation
+        cls.start = date(2090, 1, 1)
+
+    @classmethod
+    def _day(cls, offset):
+        return cls.start + timedelta(days=offset)
+
+    def _reservation_vals(self, room, day, nights, guest=None, **vals):
+        return dict({
+            'room_id': room.id,
+            'guest_id': (guest or self.guests[0]).id,
+            'check_in_date': self._day(day),
+            'check_out_date': self._day(day + nights),
+            'state': 'confirm',
+        }, **vals)
+
+    def _reserve(self, room, day, nights, guest=None, **vals):
+        return self.env['hotel.reservation'].create(self._reservation_vals(room, day, nights, guest, **vals))
@@ -0,0 +1,85 @@
+from odoo import fields
+from odoo.tests import tagged
+from datetime import timedelta
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAnalysis(HotelCommon):
+
+    def _analysis(self, day):
+        return self.env['hotel.analysis'].search([('date', '=', self._day(day))])
+
+    def test_daily_kpis(self):
+        guest, returning = self.guests[0], self.guests[1]
+        self._reserve(self.rooms[0], 0, 2, guest, service_ids=[(6, 0, self.spa.ids)])
+        self._reserve(self.rooms[1], 0, 1, returning)
+        self._reserve(self.rooms[2], 1, 1, returning)
+        # Neither drafts nor cancelled stays are sold
+        self._reserve(self.rooms[1], 1, 1, self.guests[2], state='draft')
+        self._reserve(self.rooms[1], 2, 1, self.guests[2], state='cancel')
+
+        available = self.env['hotel.room'].search_count([('state', '!=', 'under_maintenance')])
+        self.env['hotel.analysis']._refresh_analysis(self._day(0), self._day(2))
+
+        first, second, check_out = self._analysis(0), self._analysis(1), self._analysis(2)
+        self.assertRecordValues(first, [{
+            'rooms_sold': 2,
+            'repeat_stays': 0,
+            'total_available_rooms': available,
+            'total_room_revenue': 300.0,
+            'adr': 150.0,
+            'total_other_revenue': 0.0,
+        }])
+        self.assertAlmostEqual(first.revpar, 300.0 / available, places=2)
+        self.assertAlmostEqual(first.occupancy_rate, 200.0 / available, places=6)
+        # The returning guest's second stay is a repeat stay
+        self.assertRecordValues(second, [{
+            'rooms_sold': 2,
+            'repeat_stays': 1,
+            'total_room_revenue': 400.0,
+            'adr': 200.0,
+            'repeated_guest_percentage': 50.0,
+        }])
+        # Services are booked on the check-out day, which holds no room night
+        self.assertRecordValues(check_out, [{
+            'rooms_sold': 0,
+            'total_room_revenue': 0.0,
+            'adr': 0.0,
+            'total_other_revenue': 40.0,
+        }])
+        self.assertAlmostEqual(check_out.trevpar, 40.0 / available, places=2)
+
+    def test_service_changes_refresh_other_revenue(self):
+        Analysis = self.env['hotel.analysis']
+        guest = self.guests[0]
+        reservation = self._reserve(self.rooms[0], 0, 2, guest, service_ids=[(6, 0, self.spa.ids)])
+        Analysis.update_analysis_data()
+        self.assertEqual(self._analysis(2).total_other_revenue, 40.0)
+
+        guest.loyalty_dirty = False
+        self.spa.price = 50.0
+        self.assertTrue(guest.loyalty_dirty)
+        Analysis.update_analysis_data()
+        self.assertEqual(self._analysis(2).total_other_revenue, 50.0)
+
+        guest.loyalty_dirty = False
+        reservation.service_line_ids.quantity = 2
+        self.assertTrue(guest.loyalty_dirty)
+        Analysis.update_analysis_data()
+        self.assertEqual(self._analysis(2).total_other_revenue, 100.0)
+
+    def test_past_days_keep_their_counts(self):
+        Analysis = self.env['hotel.analysis']
+        today = fields.Date.context_today(Analysis)
+        past, future = today - timedelta(days=30), self._day(0)
+        Analysis._refresh_analysis(past, past)
+        Analysis._refresh_analysis(future, future)
+        available = Analysis.search([('date', '=', past)]).total_available_rooms
+
+        self.rooms[0].button_maintenance()
+        Analysis._refresh_analysis(past, past)
+        Analysis._refresh_analysis(future, future)
+        # Past days are not rewritten with today's room count, future ones are
+        self.assertEqual(Analysis.search([('date', '=', past)]).total_available_rooms, available)
+        self.assertEqual(Analysis.search([('date', '=', future)]).total_available_rooms, available - 1)
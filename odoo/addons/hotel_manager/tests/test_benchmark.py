@@ -0,0 +1,256 @@
+from odoo import fields, release
+from odoo.sql_db import Cursor
+from odoo.tests import TransactionCase, tagged
+from datetime import timedelta
+from unittest.mock import patch
+import random
+import json
+import os
+import time
+import logging
+_logger = logging.getLogger(__name__)
+
+FIRST_NAMES = ['Amina', 'Karim', 'Lina', 'Yacine', 'Sara', 'Omar', 'Nadia', 'Rayan', 'Ines', 'Walid', 'Maya', 'Adam']
+LAST_NAMES = ['Benali', 'Haddad', 'Mansouri', 'Saidi', 'Brahimi', 'Khelifi', 'Cherif', 'Meziane', 'Bouzid', 'Amrani']
+
+# Size of the synthetic hotel; the same values and seed always produce the same dataset
+BENCHMARK_PARAMS = {
+    'rooms': 50,
+    'guests': 2000,
+    'years': 2,
+    'services': 5,
+    'write_sample': 500,
+    'report_sample': 20,
+    'seed': 42,
+}
+
+# Numbers of reservations rendered by the bulk report benchmark
+REPORT_SIZES = (1000, 5000, 10000)
+
+# Rooms of the report benchmark's hotel, about 117 stays each over two years,
+# so that the largest batch can be filled
+REPORT_ROOMS = 100
+
+
+@tagged('post_install', '-at_install', '-standard', 'hotel_benchmark')
+class HotelBenchmarkCase(TransactionCase):
+    """Time the module's key paths on a synthetic hotel, rolled back with the test.
+
+    Not part of the standard test run, select it with
+    ``--test-tags hotel_benchmark``. Results are logged as JSON and also
+    written to the file named by the ``HOTEL_BENCHMARK_OUTPUT`` environment
+    variable, so runs can be compared between commits.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The chunked loyalty scoring commits, which tests cannot do
+        cls.env['ir.config_parameter'].set_param('hotel_manager.loyalty_chunk_size', 0)
+
+    def _measure(self, timings, name, func, rows=None):
+        """Time ``func`` including its pending ORM writes and store the result under ``name``.
+
+        A failing path is recorded with its error instead of aborting the run,
+        e.g. the PDF report when wkhtmltopdf is not installed.
+        """
+        cr = self.env.cr
+        queries = cr.sql_log_count
+        start = time.perf_counter()
+        error = None
+        try:
+            with cr.savepoint(flush=False):
+                func()
+                self.env.flush_all()
+        except Exception as e:
+            error = str(e)
+            _logger.warning("Benchmark step %s failed: %s", name, e)
+        seconds = time.perf_counter() - start
+        timings[name] = {
+            'seconds': round(seconds, 4),
+            'queries': cr.sql_log_count - queries,
+        }
+        if rows is not None:
+            timings[name]['rows'] = rows
+            timings[name]['rows_per_sec'] = round(rows / seconds, 1) if seconds else None
+        if error:
+            timings[name]['error'] = error
+        _logger.info("Benchmark step %s: %.3fs", name, seconds)
+
+    def _generate_dataset(self, rng, rooms, guests, years, services, timings):
+        """Create the rooms, services, guests and reservations of the benchmark, timing their creation.
+
+        Each room is booked back to back with random gaps from ``years`` ago
+        until a month ahead: past stays are done (a few cancelled and scored),
+        current ones confirmed and future ones draft or confirmed.
+        """
+        product = self.env['product.product'].create({'name': 'Benchmark Stay', 'type': 'service'})
+        room_records = self.env['hotel.room']
+        service_records = self.env['hotel.services']
+        guest_records = self.env['hotel.guest']
+
+        def create_rooms():
+            nonlocal room_records
+            room_records = room_records.create([{
+                'single_bed': rng.randint(0, 2),
+                'double_bed': rng.randint(1, 2),
+                'price': rng.choice([60, 80, 100, 150, 250]),
+                'product_id': product.id,
+            } for _ in range(rooms)])
+
+        def create_services():
+            nonlocal service_records
+            service_records = service_records.create([{
+                'service_id': f'Benchmark Service {index}',
+                'price': rng.randint(5, 50),
+                'product_id': product.id,
+            } for index in range(services)])
+
+        def create_guests():
+            nonlocal guest_records
+            guest_records = guest_records.create([{
+                'first_name': rng.choice(FIRST_NAMES),
+                'last_name': rng.choice(LAST_NAMES),
+                'email': f'guest{index}@example.com',
+                'age': rng.randint(18, 80),
+            } for index in range(guests)])
+
+        self._measure(timings, 'room_create', create_rooms, rooms)
+        self._measure(timings, 'service_create', create_services, services)
+        self._measure(timings, 'guest_create', create_guests, guests)
+
+        today = fields.Date.context_today(self.env.user)
+        vals_list = []
+        for room in room_records:
+            day = today - timedelta(days=365 * years)
+            while day < today + timedelta(days=30):
+                day += timedelta(days=rng.randint(0, 5))
+                check_out = day + timedelta(days=rng.randint(1, 7))
+                if check_out <= today:
+                    state = 'cancel' if rng.random() < 0.05 else 'done'
+                elif day <= today:
+                    state = 'confirm'
+                else:
+                    state = rng.choice(['draft', 'confirm'])
+                vals_list.append({
+                    'room_id': room.id,
+                    'guest_id': rng.choice(guest_records.ids),
+                    'check_in_date': day,
+                    'check_out_date': check_out,
+                    'state': state,
+                    'service_ids': [(6, 0, rng.sample(service_records.ids, rng.randint(0, min(2, services))))],
+                    'nps_score': rng.randint(0, 10) if state == 'done' and rng.random() < 0.3 else -1,
+                })
+                day = check_out
+
+        reservations = self.env['hotel.reservation']
+
+        def create_reservations():
+            nonlocal reservations
+            for index in range(0, len(vals_list), 1000):
+                reservations |= reservations.create(vals_list[index:index + 1000])
+
+        self._measure(timings, 'reservation_create', create_reservations, len(vals_list))
+        return {
+            'rooms': room_records,
+            'services': service_records,
+            'guests': guest_records,
+            'reservations': reservations,
+        }
+
+    def _explain(self, func, marker):
+        """Run ``func`` and return the plan of its first query containing ``marker``."""
+        queries = []
+        execute = Cursor.execute
+
+        def capture(cr, query, params=None, log_exceptions=True):
+            queries.append((str(query), params))
+            return execute(cr, query, params, log_exceptions)
+
+        with patch.object(Cursor, 'execute', capture):
+            func()
+        query, params = next(query for query in queries if marker in query[0])
+        self.env.cr.execute('EXPLAIN ' + query, params)
+        return '\n'.join(row[0] for row in self.env.cr.fetchall())
+
+    def _write_results(self, name, params, timings):
+        results = {
+            'benchmark': name,
+            'date': fields.Datetime.to_string(fields.Datetime.now()),
+            'odoo_version': release.version,
+            'module_version': self.env['ir.module.module'].search([('name', '=', 'hotel_manager')]).latest_version,
+            'params': params,
+            'timings': timings,
+        }
+        _logger.info("Benchmark %s results: %s", name, json.dumps(results))
+        output = os.environ.get('HOTEL_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'a') as output_file:
+                output_file.write(json.dumps(results) + '\n')
+        return results
+
+
+@tagged('post_install', '-at_install', '-standard', 'hotel_benchmark')
+class TestBenchmark(HotelBenchmarkCase):
+
+    def test_key_paths(self):
+        params = BENCHMARK_PARAMS
+        rng = random.Random(params['seed'])
+        timings = {}
+        data = self._generate_dataset(rng, params['rooms'], params['guests'], params['years'], params['services'], timings)
+        reservations = data['reservations']
+        Reservation = self.env['hotel.reservation']
+
+        self._measure(timings, 'analysis_full', lambda: self.env['hotel.analysis'].update_analysis_data())
+        self._measure(timings, 'loyalty_full', lambda: self.env['hotel.guest'].update_loyalty_status(), len(data['guests']))
+        self._measure(timings, 'make_rooms_available', lambda: Reservation.make_rooms_available(), params['rooms'])
+
+        sample = Reservation.browse(rng.sample(reservations.ids, min(params['write_sample'], len(reservations))))
+        drafts = sample.filtered(lambda r: r.state == 'draft')
+        self._measure(timings, 'reservation_write_state', lambda: drafts.write({'state': 'confirm'}), len(drafts))
+        self._measure(timings, 'reservation_write_services',
+                      lambda: sample.write({'service_ids': [(6, 0, rng.sample(data['services'].ids, min(2, params['services'])))]}), len(sample))
+        self._measure(timings, 'analysis_incremental', lambda: self.env['hotel.analysis'].update_analysis_data())
+        self._measure(timings, 'loyalty_incremental', lambda: self.env['hotel.guest'].update_loyalty_status())
+
+        Dashboard = self.env['hotel.dashboard']
+        self._measure(timings, 'dashboard_compute', lambda: Dashboard._compute_dashboard_data())
+        self._measure(timings, 'dashboard_cached', lambda: Dashboard.get_dashboard_data())
+
+        printed = Reservation.browse(rng.sample(reservations.ids, min(params['report_sample'], len(reservations))))
+        self._measure(timings, 'report_pdf', lambda: self.env['ir.actions.report']._render_qweb_pdf(
+            'hotel_manager.report_reservation', printed.ids), len(printed))
+
+        self._write_results('key_paths', dict(params, reservations=len(reservations)), timings)
+
+    def test_report_batches(self):
+        params = dict(BENCHMARK_PARAMS, rooms=REPORT_ROOMS)
+        timings = {}
+        self._generate_dataset(random.Random(params['seed']), params['rooms'], params['guests'],
+                               params['years'], params['services'], timings)
+        for size in REPORT_SIZES:
+            reservations = self.env['hotel.reservation'].search([], limit=size, order='id')
+            self.assertEqual(len(reservations), size, "The dataset is too small for this report size")
+            batch = self.env['hotel.report.batch']._create_batch(reservations)
+            # One page per reservation, so rows_per_sec is pages per second
+            self._measure(timings, f'report_batch_{size}', lambda: batch._render(), len(reservations))
+        self._write_results('report_batches', dict(params, sizes=list(REPORT_SIZES)), timings)
+
+    def test_guest_history_plans(self):
+        """Lookups of a few guests' stays, archived ones included, must go through the guest_id index."""
+        params = BENCHMARK_PARAMS
+        data = self._generate_dataset(random.Random(params['seed']), params['rooms'], params['guests'],
+                                      params['years'], params['services'], {})
+        self.env.flush_all()
+        self.env.cr.execute("ANALYZE hotel_reservation")
+        guests = data['guests'][:20]
+        day = fields.Date.context_today(self.env.user)
+        plans = {
+            'loyalty_features': self._explain(
+                lambda: self.env['hotel.guest']._get_loyalty_features(guests.ids), 'LEFT JOIN hotel_reservation'),
+            'analysis_day': self._explain(
+                lambda: self.env['hotel.analysis']._refresh_analysis(day, day), 'is_repeat'),
+        }
+        self._write_results('guest_history_plans', params, plans)
+        for name, plan in plans.items():
+            self.assertIn('hotel_reservation__guest_id_index', plan, f"{name} does not use the guest index:\n{plan}")
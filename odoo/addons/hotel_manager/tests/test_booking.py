@@ -0,0 +1,26 @@
+from odoo.exceptions import ValidationError
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestBooking(HotelCommon):
+
+    def test_overlapping_stays_refused(self):
+        Reservation = self.env['hotel.reservation']
+        booked = Reservation.book_room(self._reservation_vals(self.rooms[0], 0, 3))
+        self.assertEqual(booked.state, 'confirm')
+
+        with mute_logger('odoo.sql_db'), self.assertRaises(ValidationError):
+            Reservation.book_room(self._reservation_vals(self.rooms[0], 2, 2, self.guests[1]))
+
+        # The transaction stays usable, back-to-back stays and other rooms are accepted
+        Reservation.book_room([
+            self._reservation_vals(self.rooms[0], 3, 2, self.guests[1]),
+            self._reservation_vals(self.rooms[1], 0, 3, self.guests[2]),
+        ])
+
+        # A cancelled stay frees its nights
+        booked.button_cancel()
+        Reservation.book_room(self._reservation_vals(self.rooms[0], 0, 3, self.guests[2]))
@@ -0,0 +1,29 @@
+from odoo.tests import tagged
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestLoyaltyQueue(HotelCommon):
+
+    def test_marks_during_scoring_are_kept(self):
+        Guest = self.env['hotel.guest']
+        guest, other = self.guests[0], self.guests[1]
+        # The run reads the marks with the features of the queued guests
+        marks = Guest._get_loyalty_marks((guest | other).ids)
+        # A stay booked meanwhile changes the already queued guest's features
+        self._reserve(self.rooms[0], 0, 2, guest)
+        Guest._clear_loyalty_dirty(marks)
+        self.assertTrue(guest.loyalty_dirty)
+        self.assertFalse(other.loyalty_dirty)
+
+        # The next run scores the new stay and unqueues the guest
+        Guest._clear_loyalty_dirty(Guest._get_loyalty_marks(guest.ids))
+        self.assertFalse(guest.loyalty_dirty)
+
+    def test_age_change_requeues(self):
+        Guest = self.env['hotel.guest']
+        guest = self.guests[0]
+        Guest._clear_loyalty_dirty(Guest._get_loyalty_marks(guest.ids))
+        self.assertFalse(guest.loyalty_dirty)
+        guest.age = 45
+        self.assertTrue(guest.loyalty_dirty)
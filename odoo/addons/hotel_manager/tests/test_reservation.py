@@ -0,0 +1,46 @@
+from odoo.tests import tagged
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestReservation(HotelCommon):
+
+    def _create_queries(self, count, offset):
+        """Return the number of queries used to create ``count`` one-night reservations."""
+        vals_list = [
+            self._reservation_vals(self.rooms[index % 3], offset + index // 3, 1, self.guests[index % 3])
+            for index in range(count)
+        ]
+        self.env.flush_all()
+        queries = self.env.cr.sql_log_count
+        self.env['hotel.reservation'].create(vals_list)
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - queries
+
+    def test_create_batches_queries(self):
+        # Warm the registry caches (sequences, system parameters) first
+        self._create_queries(3, 0)
+        small = self._create_queries(3, 10)
+        large = self._create_queries(30, 20)
+        # Per record, only next_by_code searches the sequence and reads its
+        # next value: any other query issued per reservation (a guest line or
+        # room-night insert, a constraint check) takes the delta past this bound
+        self.assertLessEqual(large - small, 27 * 2)
+
+    def test_head_counts_queries(self):
+        parent = self.guests[1]
+        child = self.env['hotel.guest'].create({'first_name': 'Kid', 'last_name': 'Test', 'age': 8, 'parent_id': parent.id})
+        reservations = self.env['hotel.reservation'].create([
+            self._reservation_vals(self.rooms[index % 3], index // 3 * 2, 2, parent) for index in range(30)
+        ])
+        self.env['hotel.reservation.guest.line'].create([
+            {'reserv_id': reservation.id, 'guest_id': child.id} for reservation in reservations
+        ])
+        reservations[:1].num_adults
+        self.env.invalidate_all()
+        # Guest lines, then their guests' ages, whatever the number of reservations
+        with self.assertQueryCount(4):
+            reservations.mapped('num_adults')
+            reservations.mapped('num_kids')
+        self.assertEqual(set(reservations.mapped('num_adults')), {1})
+        self.assertEqual(set(reservations.mapped('num_kids')), {1})
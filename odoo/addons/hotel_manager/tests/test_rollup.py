@@ -0,0 +1,35 @@
+from odoo.tests import tagged
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRollup(HotelCommon):
+
+    def test_rollups_sum_the_days(self):
+        self._reserve(self.rooms[0], 0, 3)
+        self.env['hotel.analysis']._refresh_analysis(self._day(0), self._day(3))
+        rollup = self.env['hotel.analysis.rollup'].search([('period_type', '=', 'monthly'), ('period_start', '=', self.start)])
+        self.assertRecordValues(rollup, [{'days': 4, 'rooms_sold': 3, 'total_room_revenue': 300.0}])
+
+    def test_grouped_ratios_from_sums(self):
+        # Three nights in January at 100, one in February at 200
+        self._reserve(self.rooms[0], 0, 3)
+        self._reserve(self.rooms[1], 40, 1)
+        self.env['hotel.analysis']._refresh_analysis(self._day(0), self._day(58))
+        Rollup = self.env['hotel.analysis.rollup']
+        domain = [('period_type', '=', 'monthly'), ('period_start', '>=', self._day(0)), ('period_start', '<', self._day(59))]
+        months = Rollup.search(domain)
+        self.assertEqual(len(months), 2)
+        available = sum(months.mapped('available_room_nights'))
+
+        [group] = Rollup.read_group(domain, ['revpar', 'adr:max', 'occupancy_rate', 'repeated_guest_percentage'], ['period_type'])
+        # Not the average of the monthly ADRs, 150
+        self.assertAlmostEqual(group['adr'], 125.0)
+        self.assertAlmostEqual(group['revpar'], 500.0 / available)
+        self.assertAlmostEqual(group['occupancy_rate'], 400.0 / available)
+        repeats = sum(months.mapped('repeat_stays'))
+        self.assertAlmostEqual(group['repeated_guest_percentage'], 100.0 * repeats / 4)
+
+        # A single period keeps its own ratios
+        [january] = Rollup.read_group(domain + [('period_start', '=', self._day(0))], ['adr'], ['period_start:month'])
+        self.assertAlmostEqual(january['adr'], 100.0)
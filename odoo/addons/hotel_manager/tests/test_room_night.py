@@ -0,0 +1,23 @@
+from odoo.tests import tagged
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRoomNight(HotelCommon):
+
+    def _room_nights(self, reservation):
+        nights = self.env['hotel.room.night'].search([('reserv_id', '=', reservation.id)], order='date')
+        return [(night.room_id, night.date) for night in nights]
+
+    def test_room_night_ledger(self):
+        reservation = self._reserve(self.rooms[0], 0, 3)
+        self.assertEqual(self._room_nights(reservation), [(self.rooms[0], self._day(day)) for day in range(3)])
+
+        reservation.write({'room_id': self.rooms[1].id, 'check_out_date': self._day(2)})
+        self.assertEqual(self._room_nights(reservation), [(self.rooms[1], self._day(day)) for day in range(2)])
+
+        reservation.button_cancel()
+        self.assertEqual(self._room_nights(reservation), [])
+
+        reservation.button_confirm()
+        self.assertEqual(len(self._room_nights(reservation)), 2)
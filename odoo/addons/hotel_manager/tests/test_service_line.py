@@ -0,0 +1,22 @@
+from odoo.tests import tagged
+from .common import HotelCommon
+
+
+@tagged('post_install', '-at_install')
+class TestServiceLine(HotelCommon):
+
+    def test_service_lines_follow_services(self):
+        reservation = self._reserve(self.rooms[0], 0, 2, service_ids=[(6, 0, self.breakfast.ids)])
+        self.assertEqual(reservation.service_line_ids.service_id, self.breakfast)
+        self.assertEqual(reservation.services_total_price, 15.0)
+        self.assertEqual(reservation.total_price, 2 * 100.0 + 15.0)
+
+        reservation.service_line_ids.quantity = 2
+        reservation.write({'service_ids': [(4, self.spa.id)]})
+        self.assertEqual(reservation.service_line_ids.service_id, self.breakfast | self.spa)
+        # Existing lines are kept as edited
+        self.assertEqual(reservation.service_line_ids.filtered(lambda line: line.service_id == self.breakfast).quantity, 2)
+
+        reservation.write({'service_ids': [(3, self.breakfast.id)]})
+        self.assertEqual(reservation.service_line_ids.service_id, self.spa)
+        self.assertEqual(reservation.services_total_price, 40.0)